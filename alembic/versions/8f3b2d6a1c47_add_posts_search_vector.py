@@ -0,0 +1,38 @@
+"""add posts search_vector
+
+Revision ID: 8f3b2d6a1c47
+Revises: cdbdb4e1dbc6
+Create Date: 2026-10-17 17:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2d6a1c47'
+down_revision: Union[str, None] = 'cdbdb4e1dbc6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column is filled for existing rows when added
+    op.add_column('posts', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', text)", persisted=True),
+        nullable=True
+    ))
+    op.create_index('ix_posts_search_vector', 'posts', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_search_vector', table_name='posts',
+                  postgresql_using='gin')
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,37 @@
+"""add posts excerpt and byte_size
+
+Revision ID: cdbdb4e1dbc6
+Revises: 15044d7d0554
+Create Date: 2026-10-17 15:04:27.906511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cdbdb4e1dbc6'
+down_revision: Union[str, None] = '15044d7d0554'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('excerpt', sa.Text(), nullable=True))
+    op.add_column('posts', sa.Column('byte_size', sa.Integer(), nullable=True))
+    # Backfill existing posts, matching EXCERPT_LENGTH in app/posts/models.py
+    op.execute(
+        "UPDATE posts SET excerpt = left(text, 200), "
+        "byte_size = octet_length(text)"
+    )
+    op.alter_column('posts', 'excerpt', nullable=False)
+    op.alter_column('posts', 'byte_size', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'byte_size')
+    op.drop_column('posts', 'excerpt')
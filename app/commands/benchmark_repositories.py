@@ -0,0 +1,140 @@
+"""
+Compare the CPU cost of the ORM repositories with their asyncpg fast path
+
+Runs each lookup served by the fast path for an existing user, followed
+by the validation into response schemas that a request does, and reports
+the CPU time of this process per call. Time spent waiting for the
+database is not counted.
+
+Usage:
+    python -m app.commands.benchmark_repositories user@example.com
+    python -m app.commands.benchmark_repositories user@example.com \\
+        --iterations 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.posts.repository import FastPostRepository, PostRepository
+from app.posts.schemas import PostPreview
+from app.users.repository import FastUserRepository, UserRepository
+from app.users.schemas import UserRead
+
+# Untimed calls made first, so that statements are prepared and cached
+WARMUP_ITERATIONS = 10
+
+
+async def _user_by_id(repo: UserRepository, user_id: int, email: str,
+                      limit: int) -> None:
+    UserRead.model_validate(await repo.get_by_id(user_id))
+
+
+async def _user_by_email(repo: UserRepository, user_id: int, email: str,
+                         limit: int) -> None:
+    UserRead.model_validate(await repo.get_by_email(email))
+
+
+async def _posts_by_user_id(repo: PostRepository, user_id: int, email: str,
+                            limit: int) -> None:
+    for post in await repo.get_by_user_id(user_id, limit):
+        PostPreview.model_validate(post)
+
+
+# Lookup name: ORM repository, fast path repository, timed call
+LOOKUPS = {
+    "users.get_by_id": (UserRepository, FastUserRepository, _user_by_id),
+    "users.get_by_email": (UserRepository, FastUserRepository,
+                           _user_by_email),
+    "posts.get_by_user_id": (PostRepository, FastPostRepository,
+                             _posts_by_user_id),
+}
+
+
+async def _cpu_time_per_call(db: AsyncSession,
+                             call: Callable[[], Awaitable[None]],
+                             iterations: int) -> float:
+    for _ in range(WARMUP_ITERATIONS):
+        await call()
+        db.expunge_all()
+    start = time.process_time()
+    for _ in range(iterations):
+        await call()
+        # Every request starts with an empty identity map
+        db.expunge_all()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+async def benchmark(db: AsyncSession, email: str, iterations: int = 1000,
+                    limit: int | None = None
+                    ) -> dict[str, dict[str, float]]:
+    """
+    Measure the CPU time of each fast path lookup and its ORM equivalent
+
+    Args:
+        db: Database session
+        email: Email of the user whose data is looked up
+        iterations: Number of timed calls per lookup and implementation
+        limit: Page size of the posts listing (default: POSTS_PAGE_SIZE)
+
+    Returns:
+        dict[str, dict[str, float]]: Microseconds of CPU per call, by
+            lookup and then by implementation ("orm" or "fast")
+
+    Raises:
+        LookupError: If no user has the given email
+    """
+    user = await UserRepository(db).get_by_email(email)
+    if user is None:
+        raise LookupError(f"No user with email {email}")
+    user_id = user.id
+    limit = limit or settings.POSTS_PAGE_SIZE
+
+    results = {}
+    for name, (orm_class, fast_class, lookup) in LOOKUPS.items():
+        results[name] = {}
+        for implementation, repository in (("orm", orm_class),
+                                           ("fast", fast_class)):
+            repo = repository(db)
+            results[name][implementation] = await _cpu_time_per_call(
+                db, lambda: lookup(repo, user_id, email, limit), iterations
+            )
+    return results
+
+
+async def _main(email: str, iterations: int, limit: int | None) -> None:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        try:
+            results = await benchmark(db, email, iterations, limit)
+        except LookupError as exc:
+            raise SystemExit(str(exc))
+    for name, timings in results.items():
+        saved = timings["orm"] - timings["fast"]
+        print(f"{name:22s} orm {timings['orm']:8.1f} us  "
+              f"fast {timings['fast']:8.1f} us  "
+              f"saved {saved:8.1f} us ({saved / timings['orm']:.0%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the CPU cost of the ORM repositories with "
+                    "their asyncpg fast path"
+    )
+    parser.add_argument("email",
+                        help="Email of an existing user, ideally with a "
+                             "full page of posts")
+    parser.add_argument("--iterations", type=int, default=1000,
+                        help="Timed calls per lookup and implementation")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Posts per page (default: POSTS_PAGE_SIZE)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.email, args.iterations, args.limit))
+
+
+if __name__ == "__main__":
+    main()
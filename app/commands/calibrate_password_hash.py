@@ -0,0 +1,86 @@
+"""
+Recommend a bcrypt cost for this host
+
+Measures how long bcrypt takes at increasing costs and recommends the
+highest one that stays within a target latency, to be set as
+PASSWORD_HASH_ROUNDS.
+
+Usage:
+    python -m app.commands.calibrate_password_hash --target-ms 250
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+# Costs below this are considered too weak whatever the hardware
+RECOMMENDED_MIN_ROUNDS = 10
+
+
+def measure_hash_time(rounds: int, samples: int = 3) -> float:
+    """
+    Measure how long hashing a password takes at a given cost
+
+    Args:
+        rounds: bcrypt cost
+        samples: Number of hashes to time
+
+    Returns:
+        float: Median hashing time in milliseconds
+    """
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int = 3
+              ) -> tuple[int, dict[int, float]]:
+    """
+    Find the highest bcrypt cost whose hashing time is within a target
+
+    Args:
+        target_ms: Target hashing time in milliseconds
+        samples: Number of hashes to time per cost
+
+    Returns:
+        tuple[int, dict[int, float]]: Recommended cost and the measured
+            time in milliseconds of each cost tried
+    """
+    timings = {}
+    recommended = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        timings[rounds] = measure_hash_time(rounds, samples)
+        if timings[rounds] > target_ms:
+            break
+        recommended = rounds
+    return recommended, timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recommend a bcrypt cost for a target login latency"
+    )
+    parser.add_argument("--target-ms", type=float, default=250,
+                        help="Target hashing time in milliseconds")
+    parser.add_argument("--samples", type=int, default=3,
+                        help="Hashes timed per cost")
+    args = parser.parse_args()
+
+    recommended, timings = calibrate(args.target_ms, args.samples)
+    for rounds, elapsed in timings.items():
+        print(f"rounds={rounds:2d}  {elapsed:10.1f} ms")
+    print(f"\nRecommended: PASSWORD_HASH_ROUNDS={recommended}")
+    if recommended < RECOMMENDED_MIN_ROUNDS:
+        print(f"Warning: costs below {RECOMMENDED_MIN_ROUNDS} are weak; "
+              "consider a higher target or faster hardware")
+
+
+if __name__ == "__main__":
+    main()
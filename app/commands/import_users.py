@@ -0,0 +1,143 @@
+"""
+Bulk import users from a CSV or NDJSON file
+
+Each record needs an email and a plain text password. Passwords are
+hashed in a thread pool while the previous batch is being inserted;
+emails that are already registered are skipped, and so are invalid
+records, including NDJSON lines that are not JSON objects.
+
+Usage:
+    python -m app.commands.import_users users.csv
+    python -m app.commands.import_users users.ndjson --batch-size 5000
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_password_hash
+from app.users.repository import UserRepository
+from app.users.schemas import UserCreate
+
+
+def read_records(path: Path) -> Iterator[Any]:
+    """
+    Read user records from a CSV file with a header row, or from a file
+    with one JSON object per line
+
+    Args:
+        path: File to read; .csv files are read as CSV, others as NDJSON
+
+    Yields:
+        Any: One record per user, None for a line that is not valid JSON
+    """
+    with path.open(newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+def _validate(records: Iterable[Any],
+              counts: Counter) -> Iterator[UserCreate]:
+    for record in records:
+        if not isinstance(record, dict):
+            counts["invalid"] += 1
+            continue
+        try:
+            yield UserCreate(email=record.get("email"),
+                             password=record.get("password"))
+        except ValidationError:
+            counts["invalid"] += 1
+
+
+async def _hash_batch(executor: ThreadPoolExecutor,
+                      users: list[UserCreate]) -> list[tuple[str, str]]:
+    loop = asyncio.get_running_loop()
+    hashes = await asyncio.gather(*(
+        loop.run_in_executor(executor, get_password_hash, user.password)
+        for user in users
+    ))
+    return [(user.email, hashed) for user, hashed in zip(users, hashes)]
+
+
+async def import_users(db: AsyncSession, records: Iterable[Any],
+                       batch_size: int = 1000,
+                       workers: int | None = None) -> Counter:
+    """
+    Import users in batches, hashing one batch while inserting the last
+
+    Each batch is committed on its own, so an interrupted import keeps
+    the batches it finished.
+
+    Args:
+        db: Database session
+        records: Records with an email and a password; anything but a
+            dict is counted as invalid
+        batch_size: Number of users inserted per statement
+        workers: Number of hashing threads (default: number of CPUs)
+
+    Returns:
+        Counter: Number of imported, existing (already registered) and
+            invalid records
+    """
+    counts = Counter(imported=0, existing=0, invalid=0)
+    repo = UserRepository(db)
+    users = _validate(records, counts)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        batch = list(islice(users, batch_size))
+        hashing = asyncio.ensure_future(_hash_batch(pool, batch))
+        while batch:
+            hashed = await hashing
+            batch = list(islice(users, batch_size))
+            hashing = asyncio.ensure_future(_hash_batch(pool, batch))
+            created = await repo.create_many(hashed)
+            await db.commit()
+            counts["imported"] += len(created)
+            counts["existing"] += len(hashed) - len(created)
+        await hashing
+    return counts
+
+
+async def _main(path: Path, batch_size: int, workers: int | None) -> None:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        counts = await import_users(db, read_records(path), batch_size,
+                                    workers)
+    print(f"Imported {counts['imported']} users, skipped "
+          f"{counts['existing']} already registered and "
+          f"{counts['invalid']} invalid records")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Bulk import users from a CSV or NDJSON file"
+    )
+    parser.add_argument("path", type=Path,
+                        help="CSV file with email and password columns, "
+                             "or NDJSON file")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Users inserted per statement")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Password hashing threads (default: CPUs)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.path, args.batch_size, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,18 @@ from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.db.session import get_db
-from app.main import app
-from app.db.base import Base
 from app.core.config import settings
 
+# Keep the tests away from the application's Redis data; set before the
+# cache connects. Pub/sub channels are shared by all databases.
+settings.REDIS_DB = settings.TEST_REDIS_DB
+settings.CACHE_INVALIDATION_CHANNEL += ":test"
+
+from app.core.cache import RedisCache  # noqa: E402
+from app.db.session import get_db, get_read_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.db.base import Base  # noqa: E402
+
 # Import fixtures from feature-specific conftest files
 pytest_plugins = [
     "app.tests.users.fixtures",
@@ -39,6 +46,9 @@ async def test_db():
     # Create tables in the test database
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Cached entries of a previous run refer to rows of a dropped database;
+    # only the dedicated test Redis database is flushed
+    await RedisCache().client.flushdb()
     yield
     # Drop tables in the test database
     async with test_engine.begin() as conn:
@@ -76,6 +86,7 @@ async def client(db_session):
             await db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://localhost:8000/"
@@ -1,29 +1,178 @@
+import asyncio
 import json
-import redis
-from typing import Any, Optional
+import logging
+import random
+import time
+import zlib
+from collections import Counter, OrderedDict
+import redis.asyncio as redis
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError
+from typing import Any, Awaitable, Callable, Optional
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Replaces a value only if it still holds the expected one
+COMPARE_AND_SET_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# First byte of every value written by RedisCache.set_raw
+RAW_HEADER = b"\x00"
+ZLIB_HEADER = b"\x01"
+
+
+class LocalCache:
+    """
+    In-process LRU cache bounded by entry count and total size, with a
+    TTL per entry
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = \
+            OrderedDict()
+        self._size = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value and mark it as most recently used
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Any: Cached value if present and not expired, default otherwise
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: float) -> None:
+        """
+        Store a value, evicting least recently used entries if needed
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            size: Size of the value in bytes, counted against max_bytes
+            ttl: Seconds until the entry expires
+        """
+        self.delete(key)
+        if size > self.max_bytes or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._size += size
+        while (len(self._entries) > self.max_entries
+               or self._size > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a value if present
+
+        Args:
+            key: Cache key
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Remove all values whose key starts with the given prefix
+
+        Args:
+            prefix: Key prefix, e.g. user:42:
+        """
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self.delete(key)
+
+    def clear(self) -> None:
+        """
+        Remove all values
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the cached values"""
+        return self._size
+
 
 class RedisCache:
     """
     Utility class for Redis caching operations
+
+    When CACHE_LOCAL_ENABLED is set, values are also kept in a per-process
+    LocalCache. Invalidations are published on a Redis channel so that
+    every worker process evicts its local copy.
+
+    Values larger than CACHE_COMPRESSION_THRESHOLD are stored zlib
+    compressed. A header byte tells compressed and plain values apart.
     """
     _instance = None
     _redis_client = None
+    _local: LocalCache | None = None
+    _extra_local: list[tuple[str, LocalCache]] = []
+    _listener: asyncio.Task | None = None
+    _compare_and_set = None
+    _loading: dict[str, asyncio.Task] = {}
+    _stats: Counter = Counter()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(RedisCache, cls).__new__(cls)
-            cls._redis_client = redis.Redis(
+            # A blocking pool makes callers wait for a free connection
+            # instead of failing when all of them are in use
+            pool = redis.BlockingConnectionPool(
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
-                db=0,
-                decode_responses=True
+                db=settings.REDIS_DB,
+                decode_responses=False,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
             )
+            cls._redis_client = redis.Redis(connection_pool=pool)
+            if settings.CACHE_LOCAL_ENABLED:
+                cls._local = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES,
+                                        settings.CACHE_LOCAL_MAX_BYTES)
         return cls._instance
 
-    def set(self, key: str, value: Any, expire_time: int = 300) -> None:
+    @property
+    def client(self) -> redis.Redis:
+        """Pooled Redis client, for operations the cache does not wrap"""
+        return self._redis_client
+
+    async def close(self) -> None:
+        """
+        Stop the invalidation listener and close all pooled connections
+        """
+        await self.stop_invalidation_listener()
+        await self._redis_client.aclose()
+
+    async def set(self, key: str, value: Any, expire_time: int = 300) -> None:
         """
         Set a value in the cache with expiration time
 
@@ -32,41 +181,555 @@ class RedisCache:
             value: Value to cache
             expire_time: Seconds until expiration (default: 300 seconds)
         """
-        serialized_value = json.dumps(value)
-        self._redis_client.set(key, serialized_value, ex=expire_time)
+        serialized_value = json.dumps(value).encode("utf-8")
+        await self.set_raw(key, serialized_value, expire_time)
 
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str, local: bool = True) -> Optional[Any]:
         """
         Get a value from the cache
 
         Args:
             key: Cache key
+            local: Whether to read and fill the in-process tier
 
         Returns:
             Any: Cached value if exists, None otherwise
         """
-        value = self._redis_client.get(key)
+        value = await self.get_raw(key, local)
         if value:
             return json.loads(value)
         return None
 
-    def delete(self, key: str) -> None:
+    async def set_raw(self, key: str, value: bytes,
+                      expire_time: int = 300) -> None:
+        """
+        Set an already serialized value in the cache with expiration time
+
+        Args:
+            key: Cache key
+            value: Value to cache, compressed if large enough
+            expire_time: Seconds until expiration (default: 300 seconds)
+        """
+        await self._redis_client.set(key, self._compress(value),
+                                     ex=expire_time)
+        if self._local is not None:
+            self._local.set(key, value, len(value),
+                            min(expire_time, settings.CACHE_LOCAL_TTL))
+
+    async def get_raw(self, key: str, local: bool = True) -> Optional[bytes]:
+        """
+        Get a value from the cache without deserializing it
+
+        Args:
+            key: Cache key
+            local: Whether to read and fill the in-process tier, off for
+                values that keep their own local copy
+
+        Returns:
+            bytes: Cached value if exists, None otherwise
+        """
+        local = local and self._local is not None
+        if local:
+            value = self._local.get(key)
+            if value is not None:
+                self._stats["local_hits"] += 1
+                return value
+        value = await self._redis_client.get(key)
+        if value is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        value = self._decompress(value)
+        if local:
+            self._local.set(key, value, len(value), settings.CACHE_LOCAL_TTL)
+        return value
+
+    async def set_many(self, values: dict[str, Any],
+                       expire_time: int = 300) -> None:
+        """
+        Set several values in the cache in one pipelined round trip
+
+        Args:
+            values: Values to cache by cache key
+            expire_time: Seconds until expiration (default: 300 seconds)
+        """
+        if not values:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                serialized_value = json.dumps(value).encode("utf-8")
+                pipe.set(key, self._compress(serialized_value),
+                         ex=expire_time)
+                if self._local is not None:
+                    self._local.set(
+                        key, serialized_value, len(serialized_value),
+                        min(expire_time, settings.CACHE_LOCAL_TTL)
+                    )
+            await pipe.execute()
+
+    async def set_tagged(self, key: str, value: Any, tag: str,
+                         expire_time: int = 300, local: bool = True) -> None:
+        """
+        Set a value and record its key under a tag, so that all values of
+        the tag can be deleted together with delete_tag
+
+        The tag lives as long as the value it was last recorded with.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            tag: Key of the set recording the tagged keys
+            expire_time: Seconds until expiration (default: 300 seconds)
+            local: Whether to also store the value in the in-process tier
+        """
+        serialized_value = json.dumps(value).encode("utf-8")
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, self._compress(serialized_value), ex=expire_time)
+            pipe.sadd(tag, key)
+            pipe.expire(tag, expire_time)
+            await pipe.execute()
+        if local and self._local is not None:
+            self._local.set(key, serialized_value, len(serialized_value),
+                            min(expire_time, settings.CACHE_LOCAL_TTL))
+
+    async def compare_and_set(self, key: str, expected: bytes, value: bytes,
+                              expire_time: int = 300) -> bool:
+        """
+        Atomically replace a value written by set_raw, but only if it
+        still holds the expected value
+
+        Args:
+            key: Cache key
+            expected: Value the key must currently hold
+            value: New value
+            expire_time: Seconds until expiration (default: 300 seconds)
+
+        Returns:
+            bool: True if the value was replaced, False otherwise
+        """
+        if self._compare_and_set is None:
+            RedisCache._compare_and_set = self._redis_client.register_script(
+                COMPARE_AND_SET_SCRIPT
+            )
+        # Compression is deterministic, so stored forms can be compared
+        replaced = await self._compare_and_set(
+            keys=[key],
+            args=[self._compress(expected, count=False),
+                  self._compress(value), expire_time]
+        )
+        await self._invalidate_local({"key": key})
+        return bool(replaced)
+
+    async def delete_tag(self, tag: str) -> None:
         """
-        Delete a value from the cache
+        Delete all values recorded under a tag by set_tagged
 
         Args:
-            key: Cache key to delete
+            tag: Key of the set recording the tagged keys
         """
-        self._redis_client.delete(key)
+        keys = [key.decode("utf-8")
+                for key in await self._redis_client.smembers(tag)]
+        await self._redis_client.delete(tag)
+        await self.delete(*keys)
 
-    def clear_user_cache(self, user_id: int) -> None:
+    async def get_many(self, keys: list[str]) -> list[Optional[Any]]:
+        """
+        Get several values from the cache with a single MGET
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            list[Any]: Cached value for each key, None where missing
+        """
+        values: list[Optional[bytes]] = [None] * len(keys)
+        remote = []
+        for index, key in enumerate(keys):
+            if self._local is not None:
+                values[index] = self._local.get(key)
+            if values[index] is None:
+                remote.append(index)
+            else:
+                self._stats["local_hits"] += 1
+
+        if remote:
+            stored = await self._redis_client.mget(
+                [keys[index] for index in remote]
+            )
+            for index, value in zip(remote, stored):
+                if value is None:
+                    self._stats["misses"] += 1
+                    continue
+                self._stats["hits"] += 1
+                values[index] = self._decompress(value)
+                if self._local is not None:
+                    self._local.set(keys[index], values[index],
+                                    len(values[index]),
+                                    settings.CACHE_LOCAL_TTL)
+
+        return [json.loads(value) if value else None for value in values]
+
+    def stats(self) -> dict:
+        """
+        Get cache metrics of the current process
+
+        Returns:
+            dict: Hit and miss counts, hit ratio, bytes written before and
+                after compression and the resulting compression ratio
+        """
+        stats = {name: self._stats[name] for name in (
+            "hits", "local_hits", "misses", "writes", "compressed_writes",
+            "bytes_written", "bytes_stored"
+        )}
+        lookups = stats["hits"] + stats["local_hits"] + stats["misses"]
+        stats["hit_ratio"] = (
+            (stats["hits"] + stats["local_hits"]) / lookups
+            if lookups else 0.0
+        )
+        stats["compression_ratio"] = (
+            stats["bytes_written"] / stats["bytes_stored"]
+            if stats["bytes_stored"] else 1.0
+        )
+        return stats
+
+    def _compress(self, value: bytes, count: bool = True) -> bytes:
+        stored = RAW_HEADER + value
+        if len(value) >= settings.CACHE_COMPRESSION_THRESHOLD:
+            compressed = zlib.compress(value,
+                                       settings.CACHE_COMPRESSION_LEVEL)
+            if len(compressed) < len(value):
+                stored = ZLIB_HEADER + compressed
+        if count:
+            if stored[:1] == ZLIB_HEADER:
+                self._stats["compressed_writes"] += 1
+            self._stats["writes"] += 1
+            self._stats["bytes_written"] += len(value)
+            self._stats["bytes_stored"] += len(stored)
+        return stored
+
+    @staticmethod
+    def _decompress(stored: bytes) -> bytes:
+        header = stored[:1]
+        if header == ZLIB_HEADER:
+            return zlib.decompress(memoryview(stored)[1:])
+        if header == RAW_HEADER:
+            return stored[1:]
+        # Written before values carried a header
+        return stored
+
+    async def get_or_set(self, key: str, loader: Callable[[], Awaitable[Any]],
+                         expire_time: int | None = None,
+                         stale_time: int = 0, raw: bool = False) -> Any:
+        """
+        Get a value from the cache, loading and caching it on a miss
+
+        Concurrent misses for the same key run the loader once: callers
+        in this process share the load started by the first of them, and
+        other processes wait for the holder of a short Redis lock to fill
+        the cache. If the shared load fails or its caller is cancelled,
+        each waiting caller loads again with its own loader, so a loader
+        may use resources of its caller. Every result is
+        cached, including empty ones, with a jittered TTL. Within
+        stale_time after a value expires it is still returned to every
+        caller but the one that refreshes it.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value on a miss
+            expire_time: Seconds the value stays fresh
+                (default: REDIS_CACHE_EXPIRE)
+            stale_time: Seconds a stale value may still be served
+            raw: Whether the loader returns already serialized bytes
+                that should be cached and returned as is
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+        expire_time = expire_time or settings.REDIS_CACHE_EXPIRE
+        entry = await self.get_raw(key)
+        if entry is not None:
+            fresh_until, payload = self._unpack(entry)
+            if fresh_until > time.time() or key in self._loading:
+                return self._decode(payload, raw)
+            lock = await self._try_lock(key)
+            if lock is None:
+                # Another process is refreshing it
+                return self._decode(payload, raw)
+            return await self._load(key, loader, expire_time, stale_time,
+                                    raw, lock)
+        return await self._load(key, loader, expire_time, stale_time, raw)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                    expire_time: int, stale_time: int, raw: bool,
+                    lock: Lock | None = None) -> Any:
+        task = self._loading.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._load_once(
+                key, loader, expire_time, stale_time, raw, lock
+            ))
+            self._loading[key] = task
+            task.add_done_callback(
+                lambda done: self._loading.pop(key, None)
+                if self._loading.get(key) is done else None
+            )
+            # Not shielded: the loader may use resources of this caller,
+            # such as its database session, so the load must not outlive
+            # it if it is cancelled
+            return await task
+        if lock is not None:
+            await self._release(lock)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if (not task.cancelled()
+                    or asyncio.current_task().cancelling()):
+                # This caller was cancelled, not only the shared load
+                raise
+        except Exception:
+            # The failure may come from the resources of the caller that
+            # started the load
+            pass
+        # Load with this caller's own loader instead
+        return await self._load(key, loader, expire_time, stale_time, raw)
+
+    async def _load_once(self, key: str,
+                         loader: Callable[[], Awaitable[Any]],
+                         expire_time: int, stale_time: int, raw: bool,
+                         lock: Lock | None = None) -> Any:
+        if lock is None:
+            lock = await self._try_lock(key)
+        if lock is None:
+            deadline = time.monotonic() + settings.REDIS_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(settings.REDIS_CACHE_LOCK_POLL_INTERVAL)
+                entry = await self.get_raw(key)
+                if entry is not None:
+                    return self._decode(self._unpack(entry)[1], raw)
+            # The other loader is too slow, load it ourselves
+        try:
+            value = await loader()
+            jitter = settings.REDIS_CACHE_TTL_JITTER
+            ttl = max(1, round(expire_time
+                               * random.uniform(1 - jitter, 1 + jitter)))
+            payload = value if raw else json.dumps(value).encode("utf-8")
+            await self.set_raw(key, self._pack(time.time() + ttl, payload),
+                               expire_time=ttl + stale_time)
+            return value
+        finally:
+            if lock is not None:
+                await self._release(lock)
+
+    @staticmethod
+    def _pack(fresh_until: float, payload: bytes) -> bytes:
+        # Entries written by get_or_set are prefixed with their freshness
+        # deadline so that the payload can be served without parsing it
+        return f"{fresh_until:.3f}\n".encode("ascii") + payload
+
+    @staticmethod
+    def _unpack(entry: bytes) -> tuple[float, bytes]:
+        fresh_until, _, payload = entry.partition(b"\n")
+        return float(fresh_until), payload
+
+    @staticmethod
+    def _decode(payload: bytes, raw: bool) -> Any:
+        return payload if raw else json.loads(payload)
+
+    async def _try_lock(self, key: str) -> Lock | None:
+        lock = self._redis_client.lock(
+            f"lock:{key}", timeout=settings.REDIS_CACHE_LOCK_TIMEOUT,
+            blocking=False
+        )
+        if await lock.acquire():
+            return lock
+        return None
+
+    @staticmethod
+    async def _release(lock: Lock) -> None:
+        try:
+            await lock.release()
+        except LockError:
+            # The lock expired and may already belong to someone else
+            pass
+
+    async def delete(self, *keys: str) -> None:
+        """
+        Delete one or more values from the cache in a single round trip
+
+        Args:
+            keys: Cache keys to delete
+        """
+        if not keys:
+            return
+        await self._redis_client.delete(*keys)
+        if len(keys) == 1:
+            await self._invalidate_local({"key": keys[0]})
+        else:
+            await self._invalidate_local({"keys": list(keys)})
+
+    async def user_key(self, user_id: int, name: str,
+                       generation: str | None = None) -> str:
+        """
+        Build a cache key inside the current namespace of a user
+
+        Keys embed the user's cache generation, so bumping the
+        generation makes all of them unreachable at once.
+
+        Args:
+            user_id: User ID the cached value belongs to
+            name: Name of the cached value within the user's namespace
+            generation: User's generation if already read with
+                user_generation, to save a lookup
+
+        Returns:
+            str: Cache key, e.g. user:42:g3:posts
+        """
+        if generation is None:
+            generation = await self.user_generation(user_id)
+        return f"user:{user_id}:g{generation}:{name}"
+
+    async def user_generation(self, user_id: int) -> str:
+        """
+        Get the current cache generation of a user
+
+        The generation changes every time clear_user_cache is called
+        for the user, so it can serve as a version of the user's data.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            str: Current generation
+        """
+        generation_key = self._generation_key(user_id)
+        generation = None
+        if self._local is not None:
+            generation = self._local.get(generation_key)
+        if generation is None:
+            generation = await self._redis_client.get(generation_key)
+            if generation is None:
+                # Seed from the clock rather than 0 so that a generation
+                # is never reused if Redis loses its data
+                await self._redis_client.set(
+                    generation_key, time.time_ns() // 1_000_000, nx=True
+                )
+                generation = await self._redis_client.get(generation_key)
+            generation = generation.decode("ascii")
+            if self._local is not None:
+                self._local.set(generation_key, generation,
+                                len(generation_key),
+                                settings.CACHE_LOCAL_TTL)
+        return generation
+
+    async def clear_user_cache(self, user_id: int) -> None:
         """
         Clear all cache entries for a specific user
 
+        Entries are not deleted: the user's generation is incremented so
+        that the old keys are never read again and expire through their
+        TTL.
+
         Args:
             user_id: User ID to clear cache for
         """
-        pattern = f"user:{user_id}:*"
-        keys = self._redis_client.keys(pattern)
-        if keys:
-            self._redis_client.delete(*keys)
+        generation_key = self._generation_key(user_id)
+        # Seeded like in user_generation if the key was lost, so that
+        # the new generation cannot be one that was already handed out
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(generation_key, time.time_ns() // 1_000_000, nx=True)
+            pipe.incr(generation_key)
+            await pipe.execute()
+        await self._invalidate_local({"prefix": f"user:{user_id}:"})
+
+    def add_local_tier(self, local: LocalCache, prefix: str) -> None:
+        """
+        Register another in-process cache to be kept in sync with Redis
+
+        Keys under the prefix invalidated through this class are also
+        evicted from the registered cache, in this and every other worker
+        process. Invalidations of other keys are not published for it.
+
+        Args:
+            local: In-process cache holding copies of Redis keys
+            prefix: Prefix of every key the cache may hold, e.g. principal:
+        """
+        RedisCache._extra_local.append((prefix, local))
+
+    def _local_tiers(self) -> list[tuple[str, LocalCache]]:
+        tiers = list(self._extra_local)
+        if self._local is not None:
+            tiers.append(("", self._local))
+        return tiers
+
+    @staticmethod
+    def _concerns(prefix: str, message: dict) -> bool:
+        if "key" in message:
+            return message["key"].startswith(prefix)
+        if "keys" in message:
+            return any(key.startswith(prefix) for key in message["keys"])
+        return (message["prefix"].startswith(prefix)
+                or prefix.startswith(message["prefix"]))
+
+    async def start_invalidation_listener(self) -> None:
+        """
+        Start evicting local entries invalidated by other processes
+
+        Does nothing when no local cache is in use.
+        """
+        if not self._local_tiers() or self._listener is not None:
+            return
+        RedisCache._listener = asyncio.create_task(self._listen())
+
+    async def stop_invalidation_listener(self) -> None:
+        """
+        Stop the task started by start_invalidation_listener
+        """
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        RedisCache._listener = None
+
+    async def _invalidate_local(self, message: dict) -> None:
+        # Only published when some local tier may hold the keys
+        if not any(self._concerns(prefix, message)
+                   for prefix, _ in self._local_tiers()):
+            return
+        self._apply_invalidation(message)
+        await self._redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL,
+                                         json.dumps(message))
+
+    def _apply_invalidation(self, message: dict) -> None:
+        for _, local in self._local_tiers():
+            if "key" in message:
+                local.delete(message["key"])
+            elif "keys" in message:
+                for key in message["keys"]:
+                    local.delete(key)
+            elif "prefix" in message:
+                local.delete_prefix(message["prefix"])
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                # Messages published while we were not subscribed are lost
+                for _, local in self._local_tiers():
+                    local.clear()
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._apply_invalidation(json.loads(message["data"]))
+            except (redis.RedisError, OSError, ValueError):
+                logger.warning("Cache invalidation listener failed, "
+                               "resubscribing", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"user:{user_id}:gen"
@@ -1,5 +1,17 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
+from pydantic import BaseModel, ConfigDict
+
+
+class RateLimitPolicy(BaseModel):
+    """
+    Token bucket allowing burst requests at once, refilled at rate
+    requests per second, per client IP or per authenticated user
+    """
+    rate: float
+    burst: int
+    identity: Literal["ip", "user"] = "ip"
 
 
 class Settings(BaseSettings):
@@ -14,10 +26,117 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_HOST: str = "localhost"
 
+    # Read replicas for read-only requests, as a JSON list of URLs. A user's
+    # reads go to the primary for DB_READ_STICKY_SECONDS after they write;
+    # a failing replica is skipped for DB_REPLICA_RETRY_INTERVAL seconds.
+    DATABASE_READ_URLS: list[str] = []
+    DB_READ_STICKY_SECONDS: int = 5
+    DB_REPLICA_RETRY_INTERVAL: float = 30.0
+
+    # Database engine settings, per worker process. SQL is echoed in DEV
+    # unless DB_ECHO says otherwise ("debug" also logs result rows).
+    DB_ECHO: bool | Literal["debug"] | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # Seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection by asyncpg
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Behind PgBouncer in transaction mode, prepared statements can't be
+    # cached across transactions: caching is turned off and names are
+    # made unique
+    DB_PGBOUNCER: bool = False
+    # Run the hottest lookups as hand-written SQL on the asyncpg
+    # connection instead of through the ORM; ignored with DB_PGBOUNCER
+    DB_FAST_PATH: bool = False
+
+    # bcrypt cost; each step doubles hashing time. Pick it with
+    # python -m app.commands.calibrate_password_hash
+    PASSWORD_HASH_ROUNDS: int = 12
+
+    # Password hashing pool: bcrypt releases the GIL, so threads use all
+    # cores. Requests beyond PASSWORD_HASH_MAX_PENDING get 503.
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Cache of users authenticated by access tokens. In stateless mode the
+    # token claims are trusted without looking the user up at all.
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_LOCAL_MAX_BYTES: int = 4 * 1024 * 1024  # 4 MB
+    AUTH_CACHE_LOCAL_TTL: int = 30  # Upper bound on staleness per worker
+    AUTH_STATELESS: bool = False
+
     # Redis settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    # Database the test suite uses, and flushes, instead of REDIS_DB
+    TEST_REDIS_DB: int = 15
     REDIS_CACHE_EXPIRE: int = 300  # 300 seconds = 5 minutes
+    REDIS_CACHE_TTL_JITTER: float = 0.1  # Spread expirations by +/- 10%
+    REDIS_CACHE_LOCK_TIMEOUT: float = 10.0  # Max time a loader holds a key
+    REDIS_CACHE_LOCK_WAIT: float = 2.0  # Max wait for another loader
+    REDIS_CACHE_LOCK_POLL_INTERVAL: float = 0.05
+    CACHE_COMPRESSION_THRESHOLD: int = 1024  # Bytes
+    CACHE_COMPRESSION_LEVEL: int = 6  # zlib level, 1 (fast) to 9 (small)
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0  # Seconds to wait for a free connection
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
+    # In-process cache in front of Redis, invalidated over pub/sub
+    CACHE_LOCAL_ENABLED: bool = False
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024  # 64 MB
+    CACHE_LOCAL_TTL: int = 10  # Upper bound on staleness if a message is lost
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+
+    # Pagination settings
+    POSTS_PAGE_SIZE: int = 50
+    POSTS_MAX_PAGE_SIZE: int = 100
+    POSTS_STREAM_BATCH_SIZE: int = 100
+    POSTS_CACHE_STALE_TIME: int = 0  # Seconds stale pages may be served
+    POSTS_MULTI_GET_MAX_IDS: int = 100
+
+    # Search settings
+    POSTS_SEARCH_MAX_QUERY_LENGTH: int = 256
+    POSTS_SEARCH_CACHE_EXPIRE: int = 60  # Seconds; 0 disables the cache
+
+    # Request body size limits in bytes, enforced before the body is read.
+    # Post routes leave room for JSON escaping of 1 MB posts; the services
+    # still check the decoded text.
+    MAX_REQUEST_BODY_SIZE: int = 64 * 1024  # 64 KB
+    REQUEST_BODY_SIZE_LIMITS: dict[str, int] = {
+        "/posts/": 2 * 1024 * 1024,  # 2 MB
+        "/posts/batch": 16 * 1024 * 1024,  # 16 MB
+    }
+
+    # Rate limits by "METHOD /path". Requests over the limit get 429.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: dict[str, RateLimitPolicy] = {
+        "POST /auth/login": RateLimitPolicy(rate=0.5, burst=10),
+        "POST /auth/register": RateLimitPolicy(rate=0.5, burst=20),
+        "POST /auth/refresh": RateLimitPolicy(rate=1, burst=20),
+        "POST /posts/": RateLimitPolicy(rate=10, burst=50, identity="user"),
+        "POST /posts/batch": RateLimitPolicy(rate=1, burst=10,
+                                             identity="user"),
+    }
+    # Addresses or networks of reverse proxies and load balancers whose
+    # X-Forwarded-For / Forwarded headers are trusted for the client IP.
+    # Without them, every client behind a proxy shares the proxy's bucket.
+    RATE_LIMIT_TRUSTED_PROXIES: list[str] = []
+
+    # Token required in the X-Internal-Token header of /internal endpoints;
+    # they are disabled (404) while it is unset
+    INTERNAL_API_TOKEN: str | None = None
+
+    # Batch post creation and deletion limits
+    POSTS_BATCH_MAX_ITEMS: int = 100
+    POSTS_BATCH_MAX_BYTES: int = 8 * 1024 * 1024  # 8 MB
+    POSTS_BULK_DELETE_MAX_IDS: int = 100
 
     model_config = ConfigDict(
         env_file=".env",
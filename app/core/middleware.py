@@ -0,0 +1,203 @@
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import RateLimitPolicy, settings
+from app.core.rate_limit import RateLimiter
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware that rejects request bodies larger than a limit with
+    413 Request Entity Too Large before they are read in full.
+
+    A declared Content-Length over the limit is rejected without reading
+    the body at all; otherwise the bytes actually received are counted as
+    they stream in, so chunked requests cannot get around the limit.
+    """
+    def __init__(self, app: ASGIApp, default_limit: int,
+                 route_limits: dict[str, int] | None = None):
+        self.app = app
+        self.default_limit = default_limit
+        self.route_limits = route_limits or {}
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.route_limits.get(scope["path"], self.default_limit)
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > limit:
+            await self._reject(limit, scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Let through by FastAPI while it reads the body, so
+                    # the regular exception handler renders the 413
+                    raise self._too_large(limit)
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as exc:
+            if (exc.status_code != status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                    or response_started):
+                raise
+            await self._reject(limit, scope, receive, send)
+
+    @staticmethod
+    def _content_length(scope: Scope) -> int | None:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    def _too_large(limit: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body exceeds the maximum size of {limit} bytes"
+        )
+
+    async def _reject(self, limit: int, scope: Scope, receive: Receive,
+                      send: Send) -> None:
+        exc = self._too_large(limit)
+        response = JSONResponse({"detail": exc.detail},
+                                status_code=exc.status_code,
+                                headers={"Connection": "close"})
+        await response(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that applies per-route rate limits, answering 429 Too
+    Many Requests with Retry-After to clients over their limit.
+
+    Policies are keyed by "METHOD /path" and count requests per client IP
+    or, for "user" policies, per user ID from a valid access token
+    (falling back to the IP for anonymous requests).
+
+    Requests from a trusted proxy are counted against the address it
+    forwarded them for: the nearest X-Forwarded-For or Forwarded hop that
+    is not itself a trusted proxy.
+    """
+    def __init__(self, app: ASGIApp,
+                 policies: dict[str, RateLimitPolicy],
+                 trusted_proxies: list[str] | None = None):
+        self.app = app
+        self.policies = policies
+        self.trusted_proxies: list[IPv4Network | IPv6Network] = [
+            ip_network(proxy, strict=False)
+            for proxy in trusted_proxies or []
+        ]
+        self.limiter = RateLimiter()
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        policy = self.policies.get(route)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"rate:{route}:{self._identity(scope, policy)}"
+        retry_after = await self.limiter.hit(key, policy)
+        if retry_after > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After":
+                         self.limiter.retry_after_header(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def _identity(self, scope: Scope, policy: RateLimitPolicy) -> str:
+        if policy.identity == "user":
+            for name, value in scope["headers"]:
+                if name != b"authorization":
+                    continue
+                token = value.decode("latin-1").split(" ")[-1]
+                try:
+                    # Verified, so nobody can spend another user's budget
+                    payload = jwt.decode(token, settings.SECRET_KEY,
+                                         algorithms=[settings.ALGORITHM])
+                except JWTError:
+                    break
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+                break
+        return f"ip:{self._client_ip(scope)}"
+
+    def _client_ip(self, scope: Scope) -> str:
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        if not self._is_trusted(client_ip):
+            return client_ip
+        # Walk back from the proxy that connected to us; earlier hops are
+        # written by the client and cannot be trusted
+        for hop in reversed(self._forwarded_for(scope)):
+            client_ip = hop
+            if not self._is_trusted(hop):
+                break
+        return client_ip
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            address = ip_address(address)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    @staticmethod
+    def _forwarded_for(scope: Scope) -> list[str]:
+        forwarded, x_forwarded_for = [], []
+        for name, value in scope["headers"]:
+            if name == b"forwarded":
+                forwarded.extend(value.decode("latin-1").split(","))
+            elif name == b"x-forwarded-for":
+                x_forwarded_for.extend(value.decode("latin-1").split(","))
+        if not forwarded:
+            return [hop.strip() for hop in x_forwarded_for if hop.strip()]
+
+        hops = []
+        for element in forwarded:
+            for pair in element.split(";"):
+                key, _, value = pair.strip().partition("=")
+                if key.lower() != "for":
+                    continue
+                value = value.strip('"')
+                if value.startswith("["):
+                    # Quoted IPv6 address, with an optional port
+                    value = value[1:].partition("]")[0]
+                elif value.count(":") == 1:
+                    value = value.partition(":")[0]
+                hops.append(value)
+        return hops
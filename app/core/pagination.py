@@ -0,0 +1,58 @@
+import base64
+import binascii
+import json
+
+# Range of the int4 ID columns: larger values fail in the driver
+INT4_MIN, INT4_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def encode_cursor(data: dict) -> str:
+    """
+    Encode keyset pagination state into an opaque cursor string
+
+    Args:
+        data: JSON-serializable position of the last returned row
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Opaque cursor string received from a client
+
+    Returns:
+        dict: Decoded pagination state
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def is_int4(value) -> bool:
+    """
+    Tell whether a value can be bound to an int4 column
+
+    Args:
+        value: Value to check, for example an ID read from a cursor
+
+    Returns:
+        bool: True for an int within the int4 range, False otherwise
+            (booleans included)
+    """
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and INT4_MIN <= value <= INT4_MAX)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import time
+
+from app.core.cache import LocalCache, RedisCache
+from app.core.config import settings
+from app.users.schemas import UserRead
+
+
+class PrincipalCache:
+    """
+    Cache of the users authenticated by access tokens
+
+    Entries are keyed by the hash of the token and live until the token
+    expires, in Redis and, when CACHE_LOCAL_ENABLED is set, in an
+    in-process LRU in front of it. All entries of a user are recorded
+    under a tag so that they can be dropped at once, in every worker
+    process, when the user is deleted or disabled.
+    """
+    def __init__(self):
+        self.cache = RedisCache()
+        self._local: LocalCache | None = None
+        if settings.CACHE_LOCAL_ENABLED:
+            self._local = LocalCache(settings.AUTH_CACHE_LOCAL_MAX_ENTRIES,
+                                     settings.AUTH_CACHE_LOCAL_MAX_BYTES)
+            self.cache.add_local_tier(self._local, "principal:")
+
+    async def get(self, user_id: int, token: str) -> UserRead | None:
+        """
+        Get the user a token was issued for
+
+        Args:
+            user_id: ID of the user the token was issued for
+            token: Verified access token
+
+        Returns:
+            UserRead | None: Cached user if present, None otherwise
+        """
+        key = self._key(user_id, token)
+        if self._local is not None:
+            user = self._local.get(key)
+            if user is not None:
+                return user
+        # Kept out of the shared in-process tier, where every active token
+        # would take the place of a cached page
+        data = await self.cache.get(key, local=False)
+        if data is None:
+            return None
+        user = UserRead.model_validate(data)
+        if self._local is not None:
+            self._local.set(key, user, len(json.dumps(data)),
+                            settings.AUTH_CACHE_LOCAL_TTL)
+        return user
+
+    async def set(self, token: str, user: UserRead,
+                  expires_at: float) -> None:
+        """
+        Cache the user a token was issued for until the token expires
+
+        Args:
+            token: Verified access token
+            user: User the token was issued for
+            expires_at: Expiration time of the token, as a UNIX timestamp
+        """
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(user.id, token)
+        data = user.model_dump()
+        await self.cache.set_tagged(key, data, self._tag(user.id), ttl,
+                                    local=False)
+        if self._local is not None:
+            self._local.set(key, user, len(json.dumps(data)),
+                            min(ttl, settings.AUTH_CACHE_LOCAL_TTL))
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """
+        Drop all cached tokens of a user, e.g. when it is deleted or
+        disabled
+
+        Args:
+            user_id: ID of the user
+        """
+        await self.cache.delete_tag(self._tag(user_id))
+
+    @staticmethod
+    def _key(user_id: int, token: str) -> str:
+        token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        return f"principal:{user_id}:{token_hash[:32]}"
+
+    @staticmethod
+    def _tag(user_id: int) -> str:
+        return f"principal:{user_id}:tokens"
@@ -1,4 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 import bcrypt
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status, Request
@@ -6,7 +9,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.principals import PrincipalCache
+from app.db.session import get_db, get_read_db
+from app.users.schemas import UserRead
 
 
 class CustomHTTPBearer(HTTPBearer):
@@ -46,10 +51,27 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.PASSWORD_HASH_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash was made with a cost other than the configured one
+
+    Args:
+        hashed_password: Hashed password, e.g. $2b$12$...
+
+    Returns:
+        bool: True if the password should be hashed again
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.PASSWORD_HASH_ROUNDS
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against its hash
@@ -67,6 +89,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop in a bounded thread pool
+
+    At most max_pending calls may be running or queued at once; further
+    calls are refused with 503 Service Unavailable instead of piling up.
+    """
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking function in the pool
+
+        Args:
+            func: Function to run
+            args: Positional arguments for the function
+
+        Returns:
+            Any: Return value of the function
+
+        Raises:
+            HTTPException: If the pool is saturated
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"}
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher"
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, func, *args
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker threads
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS,
+                                 settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password using bcrypt without blocking the event loop
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        str: Hashed password
+
+    Raises:
+        HTTPException: If the hashing pool is saturated
+    """
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str,
+                                hashed_password: str) -> bool:
+    """
+    Verify a password against its hash without blocking the event loop
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password
+
+    Returns:
+        bool: True if password matches, False otherwise
+
+    Raises:
+        HTTPException: If the hashing pool is saturated
+    """
+    return await password_hasher.run(verify_password, plain_password,
+                                     hashed_password)
+
+
 def create_token(data: dict, expires_delta: timedelta) -> str:
     """
     Create a JWT token
@@ -85,34 +201,45 @@ def create_token(data: dict, expires_delta: timedelta) -> str:
                       algorithm=settings.ALGORITHM)
 
 
-def create_access_token(sub: str) -> str:
+def create_access_token(sub: str, email: str | None = None) -> str:
     """
     Create an access token
 
     Args:
         sub: Subject of the token (usually user ID)
+        email: Email of the user, trusted as is in stateless mode
 
     Returns:
         str: JWT access token
     """
+    data = {"sub": sub}
+    if email is not None:
+        data["email"] = email
     return create_token(
-        {"sub": sub},
+        data,
         timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
 
 
+principal_cache = PrincipalCache()
+
+
 async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_db)):
+        db: AsyncSession = Depends(get_read_db)) -> UserRead:
     """
     Get the current authenticated user from token
 
+    The user is looked up in the principal cache before the database.
+    With AUTH_STATELESS set, the token claims are trusted without any
+    lookup. Routes that write use get_current_writer instead.
+
     Args:
         credentials: HTTP authorization credentials
         db: Database session
 
     Returns:
-        User: Current authenticated user
+        UserRead: Current authenticated user
 
     Raises:
         HTTPException: If token is invalid or user not found
@@ -129,8 +256,43 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    from app.users.repository import UserRepository
-    user = await UserRepository(db).get_by_id(int(user_id))
-    if not user:
+
+    if settings.AUTH_STATELESS and payload.get("email"):
+        return UserRead(id=int(user_id), email=payload["email"])
+
+    if settings.AUTH_CACHE_ENABLED:
+        user = await principal_cache.get(int(user_id), token)
+        if user is not None:
+            return user
+
+    from app.users.repository import get_user_repository
+    db_user = await get_user_repository(db).get_by_id(int(user_id))
+    if not db_user:
         raise credentials_exception
+    user = UserRead.model_validate(db_user)
+    if settings.AUTH_CACHE_ENABLED and "exp" in payload:
+        await principal_cache.set(token, user, payload["exp"])
     return user
+
+
+async def get_current_writer(
+        credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_db)) -> UserRead:
+    """
+    Get the current authenticated user for a route that writes
+
+    Same as get_current_user, but the user is looked up on the route's
+    own get_db session, so that a write request never holds a read
+    session's connection alongside its read-write one.
+
+    Args:
+        credentials: HTTP authorization credentials
+        db: Database session
+
+    Returns:
+        UserRead: Current authenticated user
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return await get_current_user(credentials, db)
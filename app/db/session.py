@@ -1,14 +1,180 @@
+import asyncio
+import logging
+import time
 from typing import AsyncGenerator
+from uuid import uuid4
+
+import asyncpg
+import redis.asyncio as redis
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    create_async_engine)
 
+from app.core.cache import RedisCache
 from app.core.config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    # future=True
-)
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def engine_options() -> dict:
+    """
+    Build the engine and connection pool options from the settings
+
+    Returns:
+        dict: Keyword arguments for create_async_engine
+    """
+    echo = settings.DB_ECHO
+    if echo is None:
+        echo = settings.ENV == "DEV"
+
+    statement_cache_size = settings.DB_STATEMENT_CACHE_SIZE
+    connect_args = {}
+    if settings.DB_PGBOUNCER:
+        statement_cache_size = 0
+        connect_args["prepared_statement_name_func"] = (
+            lambda: f"__asyncpg_{uuid4()}__"
+        )
+    # asyncpg's own cache, and the one SQLAlchemy keeps in front of it
+    connect_args["statement_cache_size"] = statement_cache_size
+    connect_args["prepared_statement_cache_size"] = statement_cache_size
+
+    return {
+        "echo": echo,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine configured from the settings
+
+    Args:
+        url: Database URL
+
+    Returns:
+        AsyncEngine: Engine with its connection pool
+    """
+    return create_async_engine(url, **engine_options())
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """
+    Get the state of an engine's connection pool
+
+    Args:
+        engine: Engine to inspect
+
+    Returns:
+        dict: Pool size, checked out, idle and overflow connections
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Negative while the pool itself is not full yet
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
+def fast_path_enabled() -> bool:
+    """
+    Tell whether repositories should use their raw asyncpg fast path
+
+    It relies on statements prepared once per connection, which PgBouncer
+    in transaction mode cannot keep.
+
+    Returns:
+        bool: True if DB_FAST_PATH is set and DB_PGBOUNCER is not
+    """
+    return settings.DB_FAST_PATH and not settings.DB_PGBOUNCER
+
+
+async def driver_connection(session: AsyncSession) -> asyncpg.Connection:
+    """
+    Get the asyncpg connection under a session, for hand-written queries
+
+    Statements run on it share the session's transaction once one has
+    begun on the connection; before that they run on their own.
+
+    Args:
+        session: Database session
+
+    Returns:
+        asyncpg.Connection: Driver connection checked out by the session
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+class ReplicaPool:
+    """
+    Round-robin choice among read replicas, skipping for a while the ones
+    that failed to connect
+    """
+    def __init__(self, engines: list[AsyncEngine]):
+        self.engines = engines
+        self._next = 0
+        self._down_until: dict[int, float] = {}
+
+    def choose(self) -> AsyncEngine | None:
+        """
+        Pick the next healthy replica
+
+        Returns:
+            AsyncEngine | None: Replica engine, None if all of them are down
+        """
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self._down_until.get(index, 0) <= now:
+                return self.engines[index]
+        return None
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        """
+        Skip a replica for DB_REPLICA_RETRY_INTERVAL seconds
+
+        Args:
+            engine: Replica that failed
+        """
+        self._down_until[self.engines.index(engine)] = (
+            time.monotonic() + settings.DB_REPLICA_RETRY_INTERVAL
+        )
+
+
+def read_only(engine: AsyncEngine) -> AsyncEngine:
+    """
+    Get a view of an engine whose transactions are READ ONLY
+
+    The view shares the engine's connection pool.
+
+    Args:
+        engine: Engine to wrap
+
+    Returns:
+        AsyncEngine: Engine beginning transactions with BEGIN READ ONLY
+    """
+    return engine.execution_options(postgresql_readonly=True)
+
+
+engine = create_engine(settings.DATABASE_URL)
+read_only_engine = read_only(engine)
+replicas = ReplicaPool([read_only(create_engine(url))
+                        for url in settings.DATABASE_READ_URLS])
 
 AsyncSessionLocal = sessionmaker(
     engine,
@@ -17,10 +183,87 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            # A no-op when the service already committed its writes
             await session.commit()
         finally:
             await session.close()
+    if replicas.engines and request.method not in SAFE_METHODS:
+        await _mark_recent_writer(request)
+
+
+async def get_read_db(
+        request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get a session for read-only work, on a read replica when possible
+
+    Falls back to the primary when no replica is configured or reachable,
+    and for users who wrote within the last DB_READ_STICKY_SECONDS so
+    that they see their own writes. The transaction is READ ONLY and is
+    never committed: closing the session rolls it back.
+
+    Args:
+        request: Incoming request, used to identify the user
+
+    Yields:
+        AsyncSession: Database session
+    """
+    session = await _open_read_session(request)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def _open_read_session(request: Request) -> AsyncSession:
+    if replicas.engines and not await _is_recent_writer(request):
+        while (replica := replicas.choose()) is not None:
+            session = AsyncSessionLocal(bind=replica)
+            try:
+                # Connect now, while the primary can still be used instead
+                await session.connection()
+                return session
+            except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+                logger.warning("Read replica unavailable, skipping it",
+                               exc_info=True)
+                await session.close()
+                replicas.mark_down(replica)
+    return AsyncSessionLocal(bind=read_only_engine)
+
+
+def _request_user_id(request: Request) -> str | None:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    try:
+        payload = jwt.decode(authorization.split(" ")[-1],
+                             settings.SECRET_KEY,
+                             algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+async def _mark_recent_writer(request: Request) -> None:
+    user_id = _request_user_id(request)
+    if user_id is None:
+        return
+    try:
+        await RedisCache().client.set(f"db:sticky:{user_id}", 1,
+                                      ex=settings.DB_READ_STICKY_SECONDS)
+    except (redis.RedisError, OSError):
+        logger.warning("Could not record recent write", exc_info=True)
+
+
+async def _is_recent_writer(request: Request) -> bool:
+    user_id = _request_user_id(request)
+    if user_id is None:
+        return False
+    try:
+        return bool(await RedisCache().client.exists(f"db:sticky:{user_id}"))
+    except (redis.RedisError, OSError):
+        # Without the marker, the primary is the only safe choice
+        return True
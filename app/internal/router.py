@@ -0,0 +1,72 @@
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Security, status
+from fastapi.security import APIKeyHeader
+
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+from app.db.session import engine, pool_status
+
+internal_token_header = APIKeyHeader(name="X-Internal-Token",
+                                     auto_error=False)
+
+
+async def require_internal_token(
+        token: str | None = Security(internal_token_header)) -> None:
+    """
+    Allow only callers presenting INTERNAL_API_TOKEN
+
+    Args:
+        token: Value of the X-Internal-Token header
+
+    Raises:
+        HTTPException: 404 if no token is configured, 403 if the token
+            is missing or wrong
+    """
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Not Found")
+    if token is None or not secrets.compare_digest(
+            token.encode("utf-8"),
+            settings.INTERNAL_API_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Invalid internal token")
+
+
+router = APIRouter(prefix="/internal", tags=["internal"],
+                   dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Get cache metrics of the worker process serving the request
+
+    Returns:
+        dict: Hit, miss and compression counters
+    """
+    return RedisCache().stats()
+
+
+@router.get("/rate-limit")
+async def get_rate_limit_stats():
+    """
+    Get rate limiter metrics of the worker process serving the request
+
+    Returns:
+        dict: Allowed and limited request counters
+    """
+    return RateLimiter().stats()
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    """
+    Get the database connection pool state of the worker process serving
+    the request
+
+    Returns:
+        dict: Checked out, idle and overflow connections
+    """
+    return pool_status(engine)
@@ -1,13 +1,39 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.middleware import BodySizeLimitMiddleware, RateLimitMiddleware
+from app.core.security import password_hasher
 from app.users.router import router as users_router
 from app.posts.router import router as posts_router
+from app.internal.router import router as internal_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cache = RedisCache()
+    await cache.start_invalidation_listener()
+    yield
+    await cache.close()
+    password_hasher.shutdown()
 
 
-app = FastAPI(title="Blog API Service")
+app = FastAPI(title="Blog API Service", lifespan=lifespan)
+app.add_middleware(BodySizeLimitMiddleware,
+                   default_limit=settings.MAX_REQUEST_BODY_SIZE,
+                   route_limits=settings.REQUEST_BODY_SIZE_LIMITS)
+if settings.RATE_LIMIT_ENABLED:
+    # Added last so that it runs first and rejects before anything else
+    app.add_middleware(
+        RateLimitMiddleware, policies=settings.RATE_LIMITS,
+        trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES
+    )
 
 app.include_router(users_router)
 app.include_router(posts_router)
+app.include_router(internal_router)
 
 
 @app.get("/")
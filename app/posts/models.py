@@ -1,14 +1,43 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base import Base
 
+# Number of characters of a post kept in its excerpt
+EXCERPT_LENGTH = 200
+
+
+def _default_excerpt(context) -> str:
+    return context.get_current_parameters()["text"][:EXCERPT_LENGTH]
+
+
+def _default_byte_size(context) -> int:
+    return len(context.get_current_parameters()["text"].encode("utf-8"))
+
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Serves keyset pagination of a user's posts ordered by id
+        Index("ix_posts_user_id_id", "user_id", "id"),
+        # Serves full-text search
+        Index("ix_posts_search_vector", "search_vector",
+              postgresql_using="gin"),
+    )
+    # Do not fetch search_vector back with every INSERT
+    __mapper_args__ = {"eager_defaults": False}
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Stored so that listings never have to read the full text
+    excerpt = Column(Text, nullable=False, default=_default_excerpt)
+    byte_size = Column(Integer, nullable=False, default=_default_byte_size)
+    # Maintained by PostgreSQL; deferred so it is only read when asked for
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', text)", persisted=True)
+    ))
 
     owner = relationship("User", back_populates="posts")
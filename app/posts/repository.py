@@ -1,13 +1,34 @@
+from typing import AsyncIterator, NamedTuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import (select, delete, insert, any_, bindparam, func,
+                        tuple_, Float, Integer)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import load_only
 
+from app.core.config import settings
+from app.db.session import driver_connection, fast_path_enabled
 from app.posts.models import Post
 from app.posts.schemas import PostCreate
 
+# A separate statement with the keyset filter keeps both plans index range
+# scans; LIMIT NULL returns every row
+POSTS_BY_USER_SQL = (
+    "SELECT id, user_id, excerpt, byte_size FROM posts "
+    "WHERE user_id = $1 ORDER BY id DESC LIMIT $2"
+)
+POSTS_BY_USER_BEFORE_SQL = (
+    "SELECT id, user_id, excerpt, byte_size FROM posts "
+    "WHERE user_id = $1 AND id < $2 ORDER BY id DESC LIMIT $3"
+)
+
 
 class PostRepository:
     """
     Repository class for handling database operations related to posts
+
+    Writes are only flushed: committing them is left to the caller, so
+    that a request commits its unit of work once.
     """
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -28,24 +49,124 @@ class PostRepository:
             user_id=user_id
         )
         self.db.add(db_post)
-        await self.db.commit()
-        await self.db.refresh(db_post)
+        # Flushed with INSERT ... RETURNING id; the excerpt and size are
+        # computed client-side, so nothing has to be read back
+        await self.db.flush()
         return db_post
 
-    async def get_by_user_id(self, user_id: int) -> list[Post]:
+    async def create_many(self, posts: list[PostCreate],
+                          user_id: int) -> list[Post]:
+        """
+        Create several posts with a single multi-row INSERT ... RETURNING
+
+        Args:
+            posts: Post data to create
+            user_id: ID of the user who owns the posts
+
+        Returns:
+            list[Post]: Created post objects, in the order they were given
+        """
+        if not posts:
+            return []
+        query = insert(Post).returning(Post.id, sort_by_parameter_order=True)
+        result = await self.db.execute(
+            query,
+            [{"text": post.text, "user_id": user_id} for post in posts]
+        )
+        post_ids = result.scalars().all()
+        return [
+            Post(id=post_id, text=post.text, user_id=user_id)
+            for post_id, post in zip(post_ids, posts)
+        ]
+
+    async def get_by_user_id(self, user_id: int, limit: int | None = None,
+                             before_id: int | None = None) -> list[Post]:
         """
-        Get all posts for a specific user
+        Get posts for a specific user, newest first
+
+        Only the columns needed for a listing are loaded: the full text
+        is left out.
 
         Args:
             user_id: ID of the user
+            limit: Maximum number of posts to return (all if None)
+            before_id: Only return posts with an ID lower than this one
 
         Returns:
             list[Post]: List of user's posts
         """
-        query = select(Post).filter(Post.user_id == user_id)
+        query = (
+            select(Post)
+            .options(load_only(Post.id, Post.user_id, Post.excerpt,
+                               Post.byte_size, raiseload=True))
+            .filter(Post.user_id == user_id)
+            .order_by(Post.id.desc())
+        )
+        if before_id is not None:
+            query = query.filter(Post.id < before_id)
+        if limit is not None:
+            query = query.limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    async def stream_by_user_id(self, user_id: int) -> AsyncIterator[Post]:
+        """
+        Stream all posts for a specific user, newest first, through a
+        server-side cursor so that only one batch is held in memory
+
+        Args:
+            user_id: ID of the user
+
+        Yields:
+            Post: User's posts one at a time
+        """
+        query = (
+            select(Post)
+            .filter(Post.user_id == user_id)
+            .order_by(Post.id.desc())
+            .execution_options(yield_per=settings.POSTS_STREAM_BATCH_SIZE)
+        )
+        result = await self.db.stream_scalars(query)
+        async for post in result:
+            yield post
+
+    async def search(self, user_id: int, query: str, limit: int,
+                     after: tuple[float, int] | None = None
+                     ) -> list[tuple[Post, float]]:
+        """
+        Full-text search of a user's posts, most relevant first
+
+        Args:
+            user_id: ID of the user
+            query: Search query, in web search syntax
+            limit: Maximum number of posts to return
+            after: Rank and ID of the last post of the previous page
+
+        Returns:
+            list[tuple[Post, float]]: Matching posts with their rank
+        """
+        ts_query = func.websearch_to_tsquery("english", query)
+        rank = func.ts_rank_cd(Post.search_vector, ts_query, type_=Float)
+        statement = (
+            select(Post, rank)
+            .options(load_only(Post.id, Post.user_id, Post.excerpt,
+                               Post.byte_size, raiseload=True))
+            .filter(Post.user_id == user_id,
+                    Post.search_vector.bool_op("@@")(ts_query))
+            .order_by(rank.desc(), Post.id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            after_rank, after_id = after
+            statement = statement.filter(
+                tuple_(rank, Post.id) < tuple_(
+                    bindparam("after_rank", after_rank, type_=Float),
+                    bindparam("after_id", after_id, type_=Integer)
+                )
+            )
+        result = await self.db.execute(statement)
+        return [tuple(row) for row in result.all()]
+
     async def get_by_id(self, post_id: int) -> Post | None:
         """
         Get a post by its ID
@@ -60,6 +181,22 @@ class PostRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_many(self, post_ids: list[int]) -> list[Post]:
+        """
+        Get several posts by their IDs with a single query
+
+        Args:
+            post_ids: IDs of the posts
+
+        Returns:
+            list[Post]: Posts found, in no particular order
+        """
+        # ANY over an array keeps one statement for any number of IDs
+        ids = bindparam("post_ids", post_ids, type_=ARRAY(Integer))
+        query = select(Post).filter(Post.id == any_(ids))
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
     async def delete(self, post_id: int, user_id: int) -> bool:
         """
         Delete a post by ID if it belongs to the specified user
@@ -71,12 +208,91 @@ class PostRepository:
         Returns:
             bool: True if deleted, False if post not found
         """
-        post = await self.get_by_id(post_id)
-        if not post or post.user_id != user_id:
-            return False
+        query = (
+            delete(Post)
+            .filter(Post.id == post_id, Post.user_id == user_id)
+            .returning(Post.id)
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none() is not None
+
+    async def delete_many(self, post_ids: list[int],
+                          user_id: int) -> list[int]:
+        """
+        Delete several posts of a user with a single DELETE ... RETURNING
+
+        Args:
+            post_ids: IDs of the posts to delete
+            user_id: ID of the user who owns the posts
+
+        Returns:
+            list[int]: IDs of the posts that were actually deleted
+        """
+        if not post_ids:
+            return []
+        ids = bindparam("post_ids", post_ids, type_=ARRAY(Integer))
+        query = (
+            delete(Post)
+            .filter(Post.id == any_(ids), Post.user_id == user_id)
+            .returning(Post.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+
+class PostPreviewRow(NamedTuple):
+    """
+    Post listing entry as returned by the fast path, without ORM state
+    """
+    id: int
+    user_id: int
+    excerpt: str
+    byte_size: int
+
+
+class FastPostRepository(PostRepository):
+    """
+    Post repository whose listing of a user's posts skips the ORM
+
+    It runs fixed SQL on the asyncpg connection, which prepares each
+    statement once per connection, and returns PostPreviewRow tuples
+    instead of Post objects. Everything else is inherited unchanged.
+    """
+    async def get_by_user_id(self, user_id: int, limit: int | None = None,
+                             before_id: int | None = None
+                             ) -> list[PostPreviewRow]:
+        """
+        Get posts for a specific user, newest first
+
+        Args:
+            user_id: ID of the user
+            limit: Maximum number of posts to return (all if None)
+            before_id: Only return posts with an ID lower than this one
+
+        Returns:
+            list[PostPreviewRow]: Previews of user's posts
+        """
+        connection = await driver_connection(self.db)
+        if before_id is None:
+            records = await connection.fetch(POSTS_BY_USER_SQL, user_id,
+                                             limit)
+        else:
+            records = await connection.fetch(POSTS_BY_USER_BEFORE_SQL,
+                                             user_id, before_id, limit)
+        return [PostPreviewRow(*record) for record in records]
+
 
-        query = delete(Post).filter(Post.id == post_id,
-                                    Post.user_id == user_id)
-        await self.db.execute(query)
-        await self.db.commit()
-        return True
+def get_post_repository(db: AsyncSession) -> PostRepository:
+    """
+    Get the post repository selected by DB_FAST_PATH
+
+    Args:
+        db: Database session
+
+    Returns:
+        PostRepository: Fast path repository if enabled, ORM one otherwise
+    """
+    if fast_path_enabled():
+        return FastPostRepository(db)
+    return PostRepository(db)
@@ -1,21 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (APIRouter, Depends, Header, HTTPException, Path,
+                     Query, Response, status)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, List
 
-from app.posts.schemas import PostCreate, PostRead
-from app.posts.service import PostService
-from app.core.security import get_current_user
-from app.users.models import User
-from app.db.session import get_db
+from app.posts.schemas import (PostBulkDelete, PostBulkDeleteResult,
+                               PostCreate, PostPreview, PostRead,
+                               PostSearchResult)
+from app.posts.service import PostService, posts_adapter
+from app.core.config import settings
+from app.core.pagination import INT4_MAX, INT4_MIN, is_int4
+from app.core.security import get_current_user, get_current_writer
+from app.users.schemas import UserRead
+from app.db.session import get_db, get_read_db
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _parse_ids(ids: str) -> list[int]:
+    # The number of IDs is checked by PostService.get_posts
+    try:
+        post_ids = [int(post_id) for post_id in ids.split(",") if post_id]
+    except ValueError:
+        post_ids = None
+    if post_ids is None or not all(map(is_int4, post_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    return post_ids
+
+
+async def _close_after_stream(chunks: AsyncIterator[bytes],
+                              db: AsyncSession) -> AsyncIterator[bytes]:
+    # The session dependency exits before a streamed body is sent, so the
+    # stream reopens the session and has to release it once it is done.
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await db.close()
+
 
 @router.post("/", response_model=PostRead, status_code=status.HTTP_201_CREATED)
 async def add_post(
     post: PostCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserRead = Depends(get_current_writer)
 ):
     """
     Create a new post
@@ -32,30 +65,200 @@ async def add_post(
     return await service.create_post(post, current_user.id)
 
 
-@router.get("/", response_model=List[PostRead])
+@router.post("/batch", response_model=List[PostRead],
+             status_code=status.HTTP_201_CREATED)
+async def add_posts(
+    posts: List[PostCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: UserRead = Depends(get_current_writer)
+):
+    """
+    Create several posts in one request
+
+    Args:
+        posts: Posts data to create
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        List[PostRead]: Created posts data, in request order
+    """
+    service = PostService(db)
+    return await service.create_posts(posts, current_user.id)
+
+
+@router.get("/", response_model=List[PostPreview])
 async def get_posts(
+    limit: int = Query(settings.POSTS_PAGE_SIZE, ge=1,
+                       le=settings.POSTS_MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="Cursor of the next page"),
+    stream: bool = Query(False, description="Stream all posts as NDJSON"),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserRead = Depends(get_current_user)
+):
+    """
+    Get a page of post previews for the authenticated user, newest first
+
+    The cursor of the following page is returned in the X-Next-Cursor
+    header; the header is absent on the last page. Pages carry an ETag,
+    and a matching If-None-Match gets 304 Not Modified. With ?stream=1
+    or Accept: application/x-ndjson the whole post history is streamed
+    instead, one JSON object per line.
+
+    Args:
+        limit: Maximum number of posts to return
+        cursor: Cursor from a previous X-Next-Cursor header
+        stream: Whether to stream all posts as NDJSON
+        accept: Accept header of the request
+        if_none_match: Entity tags the client already has
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        List[PostPreview]: Previews of user's posts
+    """
+    service = PostService(db)
+    if stream or (accept and NDJSON_MEDIA_TYPE in accept):
+        return StreamingResponse(
+            _close_after_stream(service.stream_user_posts(current_user.id),
+                                db),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
+    page = await service.get_user_posts_page(current_user.id, limit, cursor,
+                                             if_none_match)
+    headers = {"ETag": page.etag}
+    if page.body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    # Cached or not, the body is already encoded: send it as is
+    return Response(content=page.body, media_type="application/json",
+                    headers=headers)
+
+
+@router.get("/batch", response_model=List[PostRead])
+async def get_posts_by_ids(
+    ids: str = Query(..., description="Comma-separated post IDs"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserRead = Depends(get_current_user)
+):
+    """
+    Get several posts of the authenticated user with their full text
+
+    Args:
+        ids: Comma-separated IDs of the posts, at most
+            POSTS_MULTI_GET_MAX_IDS
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        List[PostRead]: Posts found, in the order of ids; unknown IDs
+            and posts of other users are left out
+    """
+    service = PostService(db)
+    posts = await service.get_posts(_parse_ids(ids), current_user.id)
+    return Response(content=posts_adapter.dump_json(posts),
+                    media_type="application/json")
+
+
+@router.delete("/", response_model=PostBulkDeleteResult)
+async def delete_posts(
+    posts: PostBulkDelete,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserRead = Depends(get_current_writer)
 ):
     """
-    Get all posts for the authenticated user
+    Delete several posts in one request
+
+    IDs that do not exist or belong to another user are skipped.
 
     Args:
+        posts: IDs of the posts to delete
         db: Database session
         current_user: Authenticated user
 
     Returns:
-        List[PostRead]: List of user's posts
+        PostBulkDeleteResult: IDs of the posts that were actually deleted
     """
     service = PostService(db)
-    return await service.get_user_posts(current_user.id)
+    deleted_ids = await service.delete_posts(posts.post_ids, current_user.id)
+    return PostBulkDeleteResult(deleted_ids=deleted_ids)
+
+
+@router.get("/search", response_model=List[PostSearchResult])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1,
+                   max_length=settings.POSTS_SEARCH_MAX_QUERY_LENGTH,
+                   description="Search query, in web search syntax"),
+    limit: int = Query(settings.POSTS_PAGE_SIZE, ge=1,
+                       le=settings.POSTS_MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="Cursor of the next page"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserRead = Depends(get_current_user)
+):
+    """
+    Full-text search of the authenticated user's posts, most relevant first
+
+    The cursor of the following page is returned in the X-Next-Cursor
+    header; the header is absent on the last page.
+
+    Args:
+        response: Outgoing response, used to set the cursor header
+        q: Search query, e.g. "cats -dogs" or "\"exact phrase\""
+        limit: Maximum number of posts to return
+        cursor: Cursor from a previous X-Next-Cursor header
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        List[PostSearchResult]: Previews of matching posts with their rank
+    """
+    service = PostService(db)
+    posts, next_cursor = await service.search_posts(current_user.id, q,
+                                                    limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return posts
+
+
+@router.get("/{post_id}", response_model=PostRead)
+async def get_post(
+    post_id: int = Path(..., ge=INT4_MIN, le=INT4_MAX),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserRead = Depends(get_current_user)
+):
+    """
+    Get a single post with its full text
+
+    Args:
+        post_id: ID of the post
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        PostRead: Post data
+    """
+    service = PostService(db)
+    post = await service.get_post(post_id, current_user.id)
+
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with ID {post_id} not found"
+        )
+    return post
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
-    post_id: int,
+    post_id: int = Path(..., ge=INT4_MIN, le=INT4_MAX),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserRead = Depends(get_current_writer)
 ):
     """
     Delete a post
@@ -24,8 +24,45 @@ class PostRead(PostBase):
     )
 
 
+class PostPreview(BaseModel):
+    """
+    Schema for listing posts without their full text
+    """
+    id: int
+    user_id: int
+    excerpt: str = Field(..., description="Beginning of the post text")
+    byte_size: int = Field(..., description="Size of the full text in bytes")
+
+    model_config = ConfigDict(
+        from_attributes=True,
+    )
+
+
+class PostSearchResult(PostPreview):
+    """
+    Schema for a post matching a search query
+    """
+    rank: float = Field(..., description="Relevance of the post to the query")
+
+
 class PostDelete(BaseModel):
     """
     Schema for deleting a post
     """
     post_id: int = Field(..., description="ID of the post to delete")
+
+
+class PostBulkDelete(BaseModel):
+    """
+    Schema for deleting several posts at once
+    """
+    post_ids: list[int] = Field(..., description="IDs of the posts to delete")
+
+
+class PostBulkDeleteResult(BaseModel):
+    """
+    Schema for the result of a bulk post deletion
+    """
+    deleted_ids: list[int] = Field(
+        ..., description="IDs of the posts that were actually deleted"
+    )
@@ -1,17 +1,41 @@
+import hashlib
+from typing import AsyncIterator, NamedTuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
 
-from app.posts.repository import PostRepository
-from app.posts.schemas import PostCreate, PostRead
+from app.posts.repository import get_post_repository
+from app.posts.schemas import (PostCreate, PostPreview, PostRead,
+                               PostSearchResult)
 from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor, is_int4
+
+previews_adapter = TypeAdapter(list[PostPreview])
+posts_adapter = TypeAdapter(list[PostRead])
+search_adapter = TypeAdapter(list[PostSearchResult])
+
+
+class PostsPage(NamedTuple):
+    """
+    Page of post previews, encoded as a JSON response body
+    """
+    etag: str
+    body: bytes | None
+    next_cursor: str | None
 
 
 class PostService:
     """
     Service class for handling post-related business logic
+
+    Each write commits once, before the caches it affects are cleared, so
+    that a concurrent read cannot cache the state from before the commit.
     """
     def __init__(self, db: AsyncSession):
-        self.repo = PostRepository(db)
+        self.db = db
+        self.repo = get_post_repository(db)
         self.cache = RedisCache()
 
     async def create_post(self, post: PostCreate, user_id: int) -> PostRead:
@@ -34,47 +58,331 @@ class PostService:
             )
 
         db_post = await self.repo.create(post, user_id)
+        await self.db.commit()
 
         # Clear user's posts cache
-        self.cache.clear_user_cache(user_id)
+        await self.cache.clear_user_cache(user_id)
 
         return PostRead.model_validate(db_post)
 
-    async def get_user_posts(self, user_id: int) -> list[PostRead]:
+    async def create_posts(self, posts: list[PostCreate],
+                           user_id: int) -> list[PostRead]:
         """
-        Get all posts for a user with caching
+        Create several posts at once and clear user's post cache once
+
+        Args:
+            posts: Post data to create
+            user_id: ID of the user creating the posts
+
+        Returns:
+            list[PostRead]: Created posts data
+
+        Raises:
+            HTTPException: If the batch or one of its posts is too large
+        """
+        if len(posts) > settings.POSTS_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=("Batch exceeds the maximum of "
+                        f"{settings.POSTS_BATCH_MAX_ITEMS} posts")
+            )
+
+        total_size = 0
+        for post in posts:
+            post_size = len(post.text.encode('utf-8'))
+            if post_size > 1024 * 1024:  # 1 MB in bytes
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Post content exceeds the maximum size of 1 MB"
+                )
+            total_size += post_size
+        if total_size > settings.POSTS_BATCH_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=("Batch content exceeds the maximum size of "
+                        f"{settings.POSTS_BATCH_MAX_BYTES} bytes")
+            )
+
+        db_posts = await self.repo.create_many(posts, user_id)
+        await self.db.commit()
+
+        if db_posts:
+            # Clear user's posts cache
+            await self.cache.clear_user_cache(user_id)
+
+        return [PostRead.model_validate(post) for post in db_posts]
+
+    async def get_user_posts_page(
+            self, user_id: int, limit: int | None = None,
+            cursor: str | None = None,
+            if_none_match: str | None = None) -> PostsPage:
+        """
+        Get a page of post previews for a user as an encoded JSON body,
+        with caching
+
+        The cursor is decoded and the user's cache generation read once,
+        and serve both the entity tag and the cache key. The body is
+        serialized once, when the page is loaded, and returned as cached.
 
         Args:
             user_id: ID of the user
+            limit: Maximum number of posts to return (all if None)
+            cursor: Opaque cursor returned with the previous page
+            if_none_match: Entity tags the client already has
 
         Returns:
-            list[PostRead]: List of user's posts
+            PostsPage: Entity tag, body (None if the client already has
+                the page) and cursor of the next page
+
+        Raises:
+            HTTPException: If the cursor is invalid
+        """
+        before_id = self._decode_cursor(cursor) if cursor else None
+        generation = await self.cache.user_generation(user_id)
+        etag = self._posts_etag(user_id, generation, limit, cursor)
+        if if_none_match and self.etag_matches(etag, if_none_match):
+            return PostsPage(etag, None, None)
+
+        async def load_page() -> bytes:
+            posts = await self.repo.get_by_user_id(user_id, limit, before_id)
+            next_cursor = self.next_cursor(posts, limit) if limit else None
+            # Cache the response body itself, so that hits can be served
+            # without decoding and re-encoding it
+            body = previews_adapter.dump_json(
+                previews_adapter.validate_python(posts, from_attributes=True)
+            )
+            return (next_cursor or "").encode("ascii") + b"\n" + body
+
+        cache_key = await self.cache.user_key(
+            user_id, f"previews:{limit or 'all'}:{before_id or 'start'}",
+            generation
+        )
+        page = await self.cache.get_or_set(
+            cache_key, load_page,
+            stale_time=settings.POSTS_CACHE_STALE_TIME, raw=True
+        )
+        next_cursor, body = self._unpack_page(page)
+        return PostsPage(etag, body, next_cursor)
+
+    async def search_posts(
+            self, user_id: int, query: str, limit: int,
+            cursor: str | None = None
+    ) -> tuple[list[PostSearchResult], str | None]:
+        """
+        Search a user's posts, most relevant first, with caching
+
+        Args:
+            user_id: ID of the user
+            query: Search query, in web search syntax
+            limit: Maximum number of posts to return
+            cursor: Opaque cursor returned with the previous page
+
+        Returns:
+            tuple[list[PostSearchResult], str | None]: Matching posts and
+                cursor of the next page, None if this is the last
+
+        Raises:
+            HTTPException: If the cursor is invalid
         """
-        # Try to get from cache first
-        cache_key = f"user:{user_id}:posts"
-        cached_posts = self.cache.get(cache_key)
+        after = self._decode_search_cursor(cursor) if cursor else None
 
-        if cached_posts:
-            return [PostRead.model_validate(post) for post in cached_posts]
+        async def load_page() -> bytes:
+            rows = await self.repo.search(user_id, query, limit, after)
+            posts = [
+                PostSearchResult(id=post.id, user_id=post.user_id,
+                                 excerpt=post.excerpt,
+                                 byte_size=post.byte_size, rank=rank)
+                for post, rank in rows
+            ]
+            next_cursor = None
+            if len(posts) == limit:
+                next_cursor = encode_cursor({"rank": posts[-1].rank,
+                                             "id": posts[-1].id})
+            body = search_adapter.dump_json(posts)
+            return (next_cursor or "").encode("ascii") + b"\n" + body
 
-        # If not in cache, get from database
-        posts = await self.repo.get_by_user_id(user_id)
+        if settings.POSTS_SEARCH_CACHE_EXPIRE:
+            query_hash = hashlib.blake2b(query.encode("utf-8"),
+                                         digest_size=12).hexdigest()
+            cache_key = await self.cache.user_key(
+                user_id, f"search:{query_hash}:{limit}:{cursor or 'start'}"
+            )
+            page = await self.cache.get_or_set(
+                cache_key, load_page,
+                expire_time=settings.POSTS_SEARCH_CACHE_EXPIRE, raw=True
+            )
+        else:
+            page = await load_page()
+        next_cursor, body = self._unpack_page(page)
+        return search_adapter.validate_json(body), next_cursor
+
+    @staticmethod
+    def _decode_search_cursor(cursor: str) -> tuple[float, int]:
+        try:
+            data = decode_cursor(cursor)
+            after = float(data["rank"]), data["id"]
+        except (ValueError, KeyError, TypeError):
+            after = None
+        if after is None or not is_int4(after[1]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return after
+
+    @staticmethod
+    def _posts_etag(user_id: int, generation: str, limit: int | None,
+                    cursor: str | None) -> str:
+        # Derived from the user's cache generation, which changes whenever
+        # one of their posts is created or deleted
+        digest = hashlib.blake2b(
+            f"{user_id}:{generation}:{limit}:{cursor}".encode("utf-8"),
+            digest_size=12
+        ).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def etag_matches(etag: str, if_none_match: str) -> bool:
+        """
+        Tell whether an If-None-Match header matches an entity tag
+
+        Args:
+            etag: Strong entity tag, quoted
+            if_none_match: Value of the If-None-Match header
+
+        Returns:
+            bool: True if the client already has the tagged content
+        """
+        # If-None-Match uses weak comparison and may list several tags
+        if if_none_match.strip() == "*":
+            return True
+        return any(tag.strip().removeprefix("W/") == etag
+                   for tag in if_none_match.split(","))
 
-        # Create serializable post data for caching
-        # Only include the columns we need
-        posts_data = [
-            {
-                "id": post.id,
-                "text": post.text,
-                "user_id": post.user_id
+    @staticmethod
+    def _post_cache_key(post_id: int) -> str:
+        return f"post:{post_id}"
+
+    @staticmethod
+    def _unpack_page(page: bytes) -> tuple[str | None, bytes]:
+        next_cursor, _, body = page.partition(b"\n")
+        return next_cursor.decode("ascii") or None, body
+
+    async def get_post(self, post_id: int, user_id: int) -> PostRead | None:
+        """
+        Get a single post with its full text
+
+        Args:
+            post_id: ID of the post
+            user_id: ID of the user requesting the post
+
+        Returns:
+            PostRead | None: Post data if found and owned by the user,
+                None otherwise
+        """
+        posts = await self.get_posts([post_id], user_id)
+        return posts[0] if posts else None
+
+    async def get_posts(self, post_ids: list[int],
+                        user_id: int) -> list[PostRead]:
+        """
+        Get several posts with their full text, using per-post cache
+        entries and loading the missing ones with a single query
+
+        Args:
+            post_ids: IDs of the posts
+            user_id: ID of the user requesting the posts
+
+        Returns:
+            list[PostRead]: Posts found and owned by the user, in the
+                order of post_ids
+
+        Raises:
+            HTTPException: If too many IDs are requested
+        """
+        if len(post_ids) > settings.POSTS_MULTI_GET_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=("Cannot fetch more than "
+                        f"{settings.POSTS_MULTI_GET_MAX_IDS} posts at once")
+            )
+        post_ids = list(dict.fromkeys(post_ids))
+
+        cached_posts = await self.cache.get_many(
+            [self._post_cache_key(post_id) for post_id in post_ids]
+        )
+        posts_data = {post["id"]: post for post in cached_posts if post}
+
+        missing_ids = [post_id for post_id in post_ids
+                       if post_id not in posts_data]
+        if missing_ids:
+            loaded_posts = {
+                post.id: {
+                    "id": post.id,
+                    "text": post.text,
+                    "user_id": post.user_id
+                }
+                for post in await self.repo.get_many(missing_ids)
             }
-            for post in posts
+            await self.cache.set_many(
+                {self._post_cache_key(post_id): post
+                 for post_id, post in loaded_posts.items()},
+                expire_time=settings.REDIS_CACHE_EXPIRE
+            )
+            posts_data.update(loaded_posts)
+
+        return [
+            PostRead.model_validate(posts_data[post_id])
+            for post_id in post_ids
+            if post_id in posts_data
+            and posts_data[post_id]["user_id"] == user_id
         ]
 
-        # Cache the serialized data
-        self.cache.set(cache_key, posts_data)
+    async def stream_user_posts(self, user_id: int) -> AsyncIterator[bytes]:
+        """
+        Stream all posts for a user as newline-delimited JSON
+
+        The cache is bypassed so that memory use stays flat regardless
+        of how many posts the user has.
+
+        Args:
+            user_id: ID of the user
+
+        Yields:
+            bytes: One JSON-encoded post per line, newest first
+        """
+        async for post in self.repo.stream_by_user_id(user_id):
+            line = PostRead.model_validate(post).model_dump_json()
+            yield line.encode("utf-8") + b"\n"
 
-        return [PostRead.model_validate(post) for post in posts]
+    @staticmethod
+    def next_cursor(posts: list[PostPreview], limit: int) -> str | None:
+        """
+        Build the cursor for the page following the given one
+
+        Args:
+            posts: Posts of the current page
+            limit: Page size the posts were requested with
+
+        Returns:
+            str | None: Cursor for the next page, None if this is the last
+        """
+        if len(posts) < limit:
+            return None
+        return encode_cursor({"id": posts[-1].id})
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> int:
+        try:
+            before_id = decode_cursor(cursor)["id"]
+        except (ValueError, KeyError):
+            before_id = None
+        if not is_int4(before_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return before_id
 
     async def delete_post(self, post_id: int, user_id: int) -> bool:
         """
@@ -88,9 +396,46 @@ class PostService:
             bool: True if deleted, False if post not found
         """
         result = await self.repo.delete(post_id, user_id)
+        await self.db.commit()
 
         if result:
             # Clear user's posts cache
-            self.cache.clear_user_cache(user_id)
+            await self.cache.clear_user_cache(user_id)
+            await self.cache.delete(self._post_cache_key(post_id))
 
         return result
+
+    async def delete_posts(self, post_ids: list[int],
+                           user_id: int) -> list[int]:
+        """
+        Delete several posts at once and clear user's post cache once
+
+        Args:
+            post_ids: IDs of the posts to delete
+            user_id: ID of the user who owns the posts
+
+        Returns:
+            list[int]: IDs of the posts that were actually deleted
+
+        Raises:
+            HTTPException: If too many IDs are given
+        """
+        if len(post_ids) > settings.POSTS_BULK_DELETE_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=("Cannot delete more than "
+                        f"{settings.POSTS_BULK_DELETE_MAX_IDS} posts at once")
+            )
+        deleted_ids = await self.repo.delete_many(
+            list(dict.fromkeys(post_ids)), user_id
+        )
+        await self.db.commit()
+
+        if deleted_ids:
+            # Clear user's posts cache
+            await self.cache.clear_user_cache(user_id)
+            await self.cache.delete(
+                *(self._post_cache_key(post_id) for post_id in deleted_ids)
+            )
+
+        return deleted_ids
@@ -0,0 +1,34 @@
+import pytest
+
+from app.commands.benchmark_repositories import LOOKUPS, benchmark
+from app.posts.repository import PostRepository
+from app.posts.schemas import PostCreate
+from app.users.repository import UserRepository
+from app.users.schemas import UserCreate
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_benchmark_times_both_implementations(db_session):
+    """Test that every lookup is timed with the ORM and the fast path."""
+    user = await UserRepository(db_session).create(
+        UserCreate(email="benchmark@example.com", password="password123")
+    )
+    await PostRepository(db_session).create_many(
+        [PostCreate(text=f"Benchmark post {i}") for i in range(3)], user.id
+    )
+    await db_session.commit()
+
+    results = await benchmark(db_session, "benchmark@example.com",
+                              iterations=2)
+
+    assert list(results) == list(LOOKUPS)
+    for timings in results.values():
+        assert set(timings) == {"orm", "fast"}
+        assert all(elapsed >= 0 for elapsed in timings.values())
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_benchmark_unknown_user(db_session):
+    """Test that benchmarking a nonexistent user fails."""
+    with pytest.raises(LookupError):
+        await benchmark(db_session, "nobody@example.com", iterations=1)
@@ -0,0 +1,23 @@
+from unittest.mock import patch
+
+from app.commands import calibrate_password_hash
+from app.commands.calibrate_password_hash import calibrate
+
+
+def test_calibrate_recommends_highest_cost_within_target():
+    """Test that the highest cost within the target is recommended."""
+    # Every extra round doubles the hashing time
+    with patch.object(calibrate_password_hash, "measure_hash_time",
+                      side_effect=lambda rounds, samples: 2 ** rounds / 100):
+        recommended, timings = calibrate(target_ms=100)
+
+    assert recommended == 13
+    assert max(timings) == 14
+
+
+def test_calibrate_never_goes_below_minimum():
+    """Test that the minimum cost is recommended for tiny targets."""
+    recommended, timings = calibrate(target_ms=0, samples=1)
+
+    assert recommended == 4
+    assert list(timings) == [4]
@@ -0,0 +1,53 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.commands.import_users import import_users, read_records
+from app.core.config import settings
+from app.core.security import verify_password
+from app.users.repository import UserRepository
+
+
+def test_read_records(tmp_path):
+    """Test reading records from CSV and NDJSON files."""
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text("email,password\na@example.com,password1\n")
+    ndjson_path = tmp_path / "users.ndjson"
+    ndjson_path.write_text(
+        json.dumps({"email": "b@example.com", "password": "password2"})
+        + "\n\n{not json\n[1, 2]\n"
+    )
+
+    assert list(read_records(csv_path)) == [
+        {"email": "a@example.com", "password": "password1"}
+    ]
+    assert list(read_records(ndjson_path)) == [
+        {"email": "b@example.com", "password": "password2"}, None, [1, 2]
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_import_users(db_session):
+    """Test importing users in batches, skipping existing and invalid."""
+    records = [
+        {"email": f"import{i}@example.com", "password": f"password{i}"}
+        for i in range(5)
+    ]
+    records += [
+        {"email": "import0@example.com", "password": "password0"},
+        {"email": "not-an-email", "password": "password9"},
+        None,
+        ["import8@example.com", "password8"],
+        42,
+    ]
+
+    with patch.object(settings, "PASSWORD_HASH_ROUNDS", 4):
+        counts = await import_users(db_session, records, batch_size=2,
+                                    workers=2)
+
+    assert counts == {"imported": 5, "existing": 1, "invalid": 4}
+    user = await UserRepository(db_session).get_by_email(
+        "import3@example.com"
+    )
+    assert verify_password("password3", user.hashed_password)
@@ -0,0 +1,377 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.cache import LocalCache, RedisCache, RAW_HEADER, ZLIB_HEADER
+from app.core.config import settings
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_user_key_changes_after_clear():
+    """Test that clearing a user's cache moves them to a new namespace."""
+    cache = RedisCache()
+    user_id = 424242
+
+    key = await cache.user_key(user_id, "posts")
+    await cache.set(key, ["cached"])
+    same_key = await cache.user_key(user_id, "posts")
+    assert await cache.get(same_key) == ["cached"]
+
+    await cache.clear_user_cache(user_id)
+
+    new_key = await cache.user_key(user_id, "posts")
+    assert new_key != key
+    assert await cache.get(new_key) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_clear_user_cache_without_generation_key():
+    """Test that a lost generation is not reused after a clear."""
+    cache = RedisCache()
+    user_id = 454545
+    await cache.clear_user_cache(user_id)
+    old_generation = await cache.user_generation(user_id)
+
+    # Redis loses the key, e.g. after a restart or an eviction, which
+    # cannot happen within the millisecond the seed is taken from
+    await asyncio.sleep(0.01)
+    await cache._redis_client.delete(cache._generation_key(user_id))
+    await cache.clear_user_cache(user_id)
+
+    generation = await cache.user_generation(user_id)
+    assert int(generation) > int(old_generation)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_clear_user_cache_keeps_other_users():
+    """Test that clearing one user's cache leaves other users intact."""
+    cache = RedisCache()
+
+    key = await cache.user_key(434343, "posts")
+    await cache.set(key, [])
+    await cache.clear_user_cache(434344)
+
+    assert await cache.user_key(434343, "posts") == key
+
+
+def test_local_cache_evicts_least_recently_used():
+    """Test that the local cache keeps at most max_entries values."""
+    local = LocalCache(max_entries=2, max_bytes=1024)
+    local.set("a", 1, size=1, ttl=60)
+    local.set("b", 2, size=1, ttl=60)
+    local.get("a")  # "b" becomes the least recently used entry
+    local.set("c", 3, size=1, ttl=60)
+
+    assert local.get("a") == 1
+    assert local.get("b") is None
+    assert local.get("c") == 3
+
+
+def test_local_cache_bounded_by_bytes():
+    """Test that the local cache keeps at most max_bytes of values."""
+    local = LocalCache(max_entries=10, max_bytes=10)
+    local.set("a", "x", size=6, ttl=60)
+    local.set("b", "y", size=6, ttl=60)
+    local.set("too-big", "z", size=11, ttl=60)
+
+    assert local.get("a") is None
+    assert local.get("b") == "y"
+    assert local.get("too-big") is None
+    assert local.size == 6
+
+
+def test_local_cache_expires_entries():
+    """Test that expired entries are not returned."""
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    local.set("a", 1, size=1, ttl=60)
+    with patch("app.core.cache.time.monotonic",
+               return_value=time.monotonic() + 61):
+        assert local.get("a") is None
+    assert len(local) == 0
+
+
+def test_local_cache_delete_prefix():
+    """Test evicting every entry of a user."""
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    local.set("user:1:g0:posts", 1, size=1, ttl=60)
+    local.set("user:1:gen", 0, size=1, ttl=60)
+    local.set("user:12:g0:posts", 2, size=1, ttl=60)
+
+    local.delete_prefix("user:1:")
+
+    assert len(local) == 1
+    assert local.get("user:12:g0:posts") == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalidation_broadcast_evicts_local_copy():
+    """Test that an invalidation published by another worker is applied."""
+    cache = RedisCache()
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    with patch.object(RedisCache, "_local", local):
+        await cache.start_invalidation_listener()
+        try:
+            await asyncio.sleep(0.1)  # Let the listener subscribe
+            await cache.set("user:454545:g0:posts", ["cached"])
+            assert local.get("user:454545:g0:posts") == b'["cached"]'
+
+            # Simulate another worker clearing the user's cache
+            await cache._redis_client.publish(
+                settings.CACHE_INVALIDATION_CHANNEL,
+                json.dumps({"prefix": "user:454545:"})
+            )
+            for _ in range(50):
+                if local.get("user:454545:g0:posts") is None:
+                    break
+                await asyncio.sleep(0.05)
+
+            assert local.get("user:454545:g0:posts") is None
+        finally:
+            await cache.stop_invalidation_listener()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_tag_deletes_tagged_values():
+    """Test that all values recorded under a tag are deleted together."""
+    cache = RedisCache()
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    cache.add_local_tier(local, "tagged:")
+    try:
+        await cache.set_tagged("tagged:1", 1, "tagged:tag", 60)
+        await cache.set_tagged("tagged:2", 2, "tagged:tag", 60)
+        await cache.set("untagged", 3, 60)
+        local.set("tagged:1", 1, 1, 60)
+
+        await cache.delete_tag("tagged:tag")
+
+        assert await cache.get("tagged:1") is None
+        assert await cache.get("tagged:2") is None
+        assert await cache.get("untagged") == 3
+        assert local.get("tagged:1") is None
+    finally:
+        RedisCache._extra_local.remove(("tagged:", local))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalidations_published_only_for_local_tiers():
+    """Test that invalidating keys no local tier holds publishes nothing."""
+    cache = RedisCache()
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    cache.add_local_tier(local, "scoped:")
+    try:
+        with patch.object(cache, "_local", None), \
+                patch.object(cache._redis_client, "publish",
+                             new_callable=AsyncMock) as publish:
+            await cache.delete("other:1", "other:2")
+            await cache.clear_user_cache(565656)
+            publish.assert_not_called()
+
+            await cache.delete("scoped:1")
+            publish.assert_called_once()
+    finally:
+        RedisCache._extra_local.remove(("scoped:", local))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_compare_and_set():
+    """Test that a value is only replaced while it holds the expected one."""
+    cache = RedisCache()
+    await cache.set_raw("cas:key", b"first", 60)
+
+    assert await cache.compare_and_set("cas:key", b"first", b"second", 60)
+    assert not await cache.compare_and_set("cas:key", b"first", b"third",
+                                           60)
+    assert await cache.get_raw("cas:key") == b"second"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_coalesces_concurrent_misses():
+    """Test that concurrent misses for the same key load it once."""
+    cache = RedisCache()
+    key = "test:get_or_set:coalesce"
+    await cache.delete(key)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return ["loaded"]
+
+    results = await asyncio.gather(
+        *(cache.get_or_set(key, loader) for _ in range(5))
+    )
+
+    assert calls == 1
+    assert results == [["loaded"]] * 5
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_cancelled_caller_cancels_its_load():
+    """Test that waiters load again when the loading caller is cancelled."""
+    cache = RedisCache()
+    key = "test:get_or_set:cancelled"
+    await cache.delete(key)
+    started = asyncio.Event()
+    cancelled = False
+
+    async def first_loader():
+        nonlocal cancelled
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return "first"
+
+    first = asyncio.create_task(cache.get_or_set(key, first_loader))
+    await started.wait()
+    waiter = asyncio.create_task(
+        cache.get_or_set(key, AsyncMock(return_value="waiter"))
+    )
+    await asyncio.sleep(0.05)
+    first.cancel()
+
+    assert await waiter == "waiter"
+    assert cancelled
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_reloads_after_failed_shared_load():
+    """Test that waiters do not get the error of another caller's load."""
+    cache = RedisCache()
+    key = "test:get_or_set:failed"
+    await cache.delete(key)
+
+    async def failing_loader():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("session closed")
+
+    first = asyncio.create_task(cache.get_or_set(key, failing_loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(
+        cache.get_or_set(key, AsyncMock(return_value="waiter"))
+    )
+
+    assert await waiter == "waiter"
+    with pytest.raises(RuntimeError):
+        await first
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_caches_empty_result():
+    """Test that an empty result is a cache hit on the next call."""
+    cache = RedisCache()
+    key = "test:get_or_set:empty"
+    await cache.delete(key)
+    loader = AsyncMock(return_value=[])
+
+    assert await cache.get_or_set(key, loader) == []
+    assert await cache.get_or_set(key, loader) == []
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_jitters_ttl():
+    """Test that the TTL is spread around the requested one."""
+    cache = RedisCache()
+    key = "test:get_or_set:jitter"
+    await cache.delete(key)
+
+    await cache.get_or_set(key, AsyncMock(return_value=1), expire_time=100)
+
+    ttl = await cache._redis_client.ttl(key)
+    jitter = settings.REDIS_CACHE_TTL_JITTER
+    assert 100 * (1 - jitter) - 1 <= ttl <= 100 * (1 + jitter)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_waits_for_other_process():
+    """Test that a miss waits for the process holding the lock."""
+    cache = RedisCache()
+    key = "test:get_or_set:wait"
+    await cache.delete(key)
+    loader = AsyncMock(return_value="mine")
+
+    # Another process holds the lock and fills the cache shortly after
+    await cache._redis_client.set(f"lock:{key}", "other", ex=10)
+    task = asyncio.create_task(cache.get_or_set(key, loader))
+    await asyncio.sleep(0.1)
+    await cache.set_raw(key, f'{time.time() + 60}\n"theirs"'.encode())
+
+    assert await task == "theirs"
+    loader.assert_not_awaited()
+    await cache._redis_client.delete(f"lock:{key}")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_or_set_serves_stale_while_refreshing():
+    """Test that a stale value is served while someone else refreshes."""
+    cache = RedisCache()
+    key = "test:get_or_set:stale"
+    await cache.set_raw(key, f'{time.time() - 1}\n"old"'.encode(),
+                        expire_time=60)
+    loader = AsyncMock(return_value="new")
+
+    # Another process is already refreshing the value
+    await cache._redis_client.set(f"lock:{key}", "other", ex=10)
+    assert await cache.get_or_set(key, loader, stale_time=60) == "old"
+    loader.assert_not_awaited()
+
+    # Nobody is refreshing it: this caller does
+    await cache._redis_client.delete(f"lock:{key}")
+    assert await cache.get_or_set(key, loader, stale_time=60) == "new"
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_large_values_are_compressed():
+    """Test that values over the threshold are stored compressed."""
+    cache = RedisCache()
+    key = "test:compression:large"
+    value = b"compressible " * settings.CACHE_COMPRESSION_THRESHOLD
+
+    await cache.set_raw(key, value)
+
+    stored = await cache._redis_client.get(key)
+    assert stored[:1] == ZLIB_HEADER
+    assert len(stored) < len(value)
+    assert await cache.get_raw(key) == value
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_small_values_are_stored_plain():
+    """Test that values under the threshold are stored as is."""
+    cache = RedisCache()
+    key = "test:compression:small"
+
+    await cache.set(key, {"small": True})
+
+    stored = await cache._redis_client.get(key)
+    assert stored == RAW_HEADER + b'{"small": true}'
+    assert await cache.get(key) == {"small": True}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stats_count_hits_misses_and_compression():
+    """Test that cache metrics reflect reads and writes."""
+    cache = RedisCache()
+    key = "test:stats"
+    await cache.delete(key)
+    before = cache.stats()
+
+    await cache.get_raw(key)
+    await cache.set_raw(key, b"x" * settings.CACHE_COMPRESSION_THRESHOLD)
+    await cache.get_raw(key)
+
+    after = cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+    assert after["compressed_writes"] == before["compressed_writes"] + 1
+    assert after["compression_ratio"] > 1
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.core.middleware import BodySizeLimitMiddleware
+
+
+def make_client() -> AsyncClient:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, default_limit=10,
+                       route_limits={"/large": 100})
+
+    @app.post("/small")
+    @app.post("/large")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return AsyncClient(transport=ASGITransport(app=app),
+                       base_url="http://test")
+
+
+async def chunks(count: int, size: int):
+    for _ in range(count):
+        yield b"x" * size
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_body_within_limit():
+    """Test that bodies within the limit reach the route."""
+    async with make_client() as client:
+        response = await client.post("/small", content=b"x" * 10)
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 10}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_content_length_over_limit():
+    """Test that a declared Content-Length over the limit is rejected."""
+    async with make_client() as client:
+        response = await client.post("/small", content=b"x" * 11)
+
+    assert response.status_code == 413
+    assert "exceeds" in response.json()["detail"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_streamed_body_over_limit():
+    """Test that a chunked body is rejected once it crosses the limit."""
+    async with make_client() as client:
+        response = await client.post("/small", content=chunks(5, 4))
+
+    assert response.status_code == 413
+    assert "exceeds" in response.json()["detail"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_route_limit():
+    """Test that a route specific limit overrides the default."""
+    async with make_client() as client:
+        response = await client.post("/large", content=chunks(5, 20))
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
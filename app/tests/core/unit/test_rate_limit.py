@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import RateLimitPolicy
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import RateLimiter
+from app.core.security import create_access_token
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limiter_allows_burst_then_limits():
+    """Test that a bucket allows its burst and then asks to retry."""
+    limiter = RateLimiter()
+    policy = RateLimitPolicy(rate=0.5, burst=2)
+    key = f"rate:test:{uuid.uuid4()}"
+
+    assert await limiter.hit(key, policy) == 0
+    assert await limiter.hit(key, policy) == 0
+    retry_after = await limiter.hit(key, policy)
+    assert 0 < retry_after <= 2
+
+    # Known to be over the limit: rejected without asking Redis
+    local_rejections = limiter.stats()["local_rejections"]
+    assert await limiter.hit(key, policy) > 0
+    assert limiter.stats()["local_rejections"] == local_rejections + 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limit_middleware():
+    """Test that clients over the limit get 429 with Retry-After."""
+    path = f"/limited/{uuid.uuid4()}"
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, policies={
+        f"GET {path}": RateLimitPolicy(rate=0.1, burst=1, identity="user")
+    })
+
+    @app.get(path)
+    async def limited():
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url="http://test") as client:
+        assert (await client.get(path)).status_code == 200
+        response = await client.get(path)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # Authenticated users get their own bucket
+        token = create_access_token("987654")
+        response = await client.get(
+            path, headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limit_middleware_behind_proxy():
+    """Test that clients behind a trusted proxy get their own bucket."""
+    path = f"/limited/{uuid.uuid4()}"
+    policies = {f"GET {path}": RateLimitPolicy(rate=0.1, burst=1)}
+    app = FastAPI()
+    # The test transport connects from 127.0.0.1
+    app.add_middleware(RateLimitMiddleware, policies=policies,
+                       trusted_proxies=["127.0.0.0/8"])
+
+    @app.get(path)
+    async def limited():
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url="http://test") as client:
+        first = {"X-Forwarded-For": "203.0.113.1"}
+        assert (await client.get(path, headers=first)).status_code == 200
+        assert (await client.get(path, headers=first)).status_code == 429
+
+        # A spoofed first hop does not escape the bucket
+        spoofed = {"X-Forwarded-For": "198.51.100.9, 203.0.113.1"}
+        assert (await client.get(path, headers=spoofed)).status_code == 429
+
+        second = {"Forwarded": 'for="[2001:db8::1]:4711";proto=https'}
+        assert (await client.get(path, headers=second)).status_code == 200
+
+
+def test_forwarded_headers_ignored_from_untrusted_clients():
+    """Test that only trusted proxies can set the client address."""
+    scope = {
+        "client": ("192.0.2.7", 1234),
+        "headers": [(b"x-forwarded-for", b"203.0.113.1")],
+    }
+    untrusted = RateLimitMiddleware(None, {})
+    trusted = RateLimitMiddleware(None, {}, trusted_proxies=["192.0.2.0/24"])
+
+    assert untrusted._client_ip(scope) == "192.0.2.7"
+    assert trusted._client_ip(scope) == "203.0.113.1"
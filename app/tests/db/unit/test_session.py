@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import session as db_session_module
+from app.db.session import (ReplicaPool, create_engine, engine_options,
+                            pool_status, read_only, read_only_engine)
+
+
+def make_request(method: str, user_id: str) -> Request:
+    token = create_access_token(user_id)
+    return Request({
+        "type": "http",
+        "method": method,
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+def test_echo_follows_environment():
+    """Test that SQL is only echoed in DEV unless configured."""
+    with patch.object(settings, "DB_ECHO", None):
+        with patch.object(settings, "ENV", "PROD"):
+            assert engine_options()["echo"] is False
+        with patch.object(settings, "ENV", "DEV"):
+            assert engine_options()["echo"] is True
+    with patch.object(settings, "DB_ECHO", "debug"):
+        assert engine_options()["echo"] == "debug"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_pgbouncer_mode(test_db):
+    """Test that PgBouncer mode disables statement caches and still works."""
+    with patch.object(settings, "DB_PGBOUNCER", True):
+        connect_args = engine_options()["connect_args"]
+        engine = create_engine(settings.TEST_DATABASE_URL)
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    try:
+        async with engine.connect() as conn:
+            for _ in range(2):
+                result = await conn.execute(text("SELECT 1"))
+                assert result.scalar() == 1
+        assert pool_status(engine)["idle"] == 1
+    finally:
+        await engine.dispose()
+
+
+def test_replica_pool_round_robin_skips_down_replicas():
+    """Test that replicas are used in turn and failed ones are skipped."""
+    first, second = object(), object()
+    pool = ReplicaPool([first, second])
+
+    assert [pool.choose() for _ in range(3)] == [first, second, first]
+
+    pool.mark_down(first)
+    assert [pool.choose() for _ in range(2)] == [second, second]
+
+    pool.mark_down(second)
+    assert pool.choose() is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_session_falls_back_to_primary():
+    """Test that an unreachable replica is skipped for the primary."""
+    replica = create_engine(
+        "postgresql+asyncpg://nobody@127.0.0.1:1/nowhere"
+    )
+    pool = ReplicaPool([replica])
+    try:
+        with patch.object(db_session_module, "replicas", pool):
+            session = await db_session_module._open_read_session(
+                make_request("GET", "555001")
+            )
+        assert session.bind is read_only_engine
+        assert pool.choose() is None
+        await session.close()
+    finally:
+        await replica.dispose()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reads_stick_to_primary_after_write(test_db):
+    """Test that a user's reads go to the primary right after a write."""
+    replica = create_engine(settings.TEST_DATABASE_URL)
+    pool = ReplicaPool([replica])
+    try:
+        with patch.object(db_session_module, "replicas", pool):
+            session = await db_session_module._open_read_session(
+                make_request("GET", "555002")
+            )
+            assert session.bind is replica
+            await session.close()
+
+            await db_session_module._mark_recent_writer(
+                make_request("POST", "555002")
+            )
+            session = await db_session_module._open_read_session(
+                make_request("GET", "555002")
+            )
+            assert session.bind is read_only_engine
+            await session.close()
+    finally:
+        await replica.dispose()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_session_is_read_only(test_db):
+    """Test that read sessions run in a READ ONLY transaction."""
+    engine = create_engine(settings.TEST_DATABASE_URL)
+    try:
+        async with AsyncSession(bind=read_only(engine)) as session:
+            result = await session.execute(
+                text("SHOW transaction_read_only")
+            )
+            assert result.scalar() == "on"
+            with pytest.raises(DBAPIError):
+                await session.execute(text("CREATE TABLE unused (id int)"))
+        async with AsyncSession(bind=engine) as session:
+            result = await session.execute(
+                text("SHOW transaction_read_only")
+            )
+            assert result.scalar() == "off"
+    finally:
+        await engine.dispose()
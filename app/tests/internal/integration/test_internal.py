@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+
+TOKEN = "internal-test-token"
+HEADERS = {"X-Internal-Token": TOKEN}
+
+
+@pytest.fixture(autouse=True)
+def internal_token():
+    with patch.object(settings, "INTERNAL_API_TOKEN", TOKEN):
+        yield
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_cache_stats(client):
+    """Test the cache metrics endpoint."""
+    response = await client.get("/internal/cache", headers=HEADERS)
+
+    assert response.status_code == 200
+    data = response.json()
+    for name in ("hits", "misses", "hit_ratio", "compression_ratio"):
+        assert name in data
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_rate_limit_stats(client):
+    """Test the rate limiter metrics endpoint."""
+    response = await client.get("/internal/rate-limit", headers=HEADERS)
+
+    assert response.status_code == 200
+    data = response.json()
+    for name in ("allowed", "limited", "local_rejections", "errors"):
+        assert name in data
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_db_pool_stats(client):
+    """Test the connection pool state endpoint."""
+    response = await client.get("/internal/db-pool", headers=HEADERS)
+
+    assert response.status_code == 200
+    data = response.json()
+    for name in ("size", "checked_out", "idle", "overflow"):
+        assert name in data
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_internal_endpoints_require_token(client):
+    """Test that internal endpoints reject callers without the token."""
+    response = await client.get("/internal/cache")
+    assert response.status_code == 403
+
+    response = await client.get("/internal/cache",
+                                headers={"X-Internal-Token": "wrong"})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_internal_endpoints_disabled_without_token(client):
+    """Test that internal endpoints are hidden while no token is set."""
+    with patch.object(settings, "INTERNAL_API_TOKEN", None):
+        response = await client.get("/internal/cache", headers=HEADERS)
+
+    assert response.status_code == 404
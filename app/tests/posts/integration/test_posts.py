@@ -1,5 +1,13 @@
+import json
+from unittest.mock import patch
+
 import pytest
 
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.posts.models import EXCERPT_LENGTH
+
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_post(client, test_user_token):
@@ -18,6 +26,35 @@ async def test_create_post(client, test_user_token):
     assert "user_id" in data
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_posts_batch(client, test_user_token):
+    """Test creating several posts in one request."""
+    texts = [f"Batch post {i}" for i in range(3)]
+    response = await client.post(
+        "/posts/batch",
+        json=[{"text": text} for text in texts],
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert [post["text"] for post in data] == texts
+    assert len({post["id"] for post in data}) == 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_posts_batch_too_many(client, test_user_token):
+    """Test that a batch over the item limit is rejected."""
+    response = await client.post(
+        "/posts/batch",
+        json=[{"text": "x"}] * (settings.POSTS_BATCH_MAX_ITEMS + 1),
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 413
+    assert "exceeds" in response.json()["detail"]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_posts(client, test_user_token, test_posts):
     """Test getting all posts for the authenticated user."""
@@ -34,8 +71,211 @@ async def test_get_posts(client, test_user_token, test_posts):
     # Check structure of returned posts
     for post in data:
         assert "id" in post
-        assert "text" in post
+        assert "excerpt" in post
+        assert "byte_size" in post
         assert "user_id" in post
+        assert "text" not in post
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_paginated(client, test_user_token, test_posts):
+    """Test walking through posts page by page with a cursor."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    seen_ids = []
+    cursor = None
+
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/posts/", params=params, headers=headers)
+
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen_ids.extend(post["id"] for post in page)
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # Pages are ordered newest first and never overlap
+    assert seen_ids == sorted(set(seen_ids), reverse=True)
+    assert {post.id for post in test_posts} <= set(seen_ids)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_served_from_cached_body(client, test_user_token,
+                                                 test_posts):
+    """Test that a cached page is returned without rebuilding it."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    first = await client.get("/posts/", params={"limit": 2}, headers=headers)
+
+    with patch.object(RedisCache, "_load") as mock_load:
+        second = await client.get("/posts/", params={"limit": 2},
+                                  headers=headers)
+        mock_load.assert_not_called()
+
+    assert second.status_code == 200
+    assert second.headers["content-type"] == "application/json"
+    assert second.json() == first.json()
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_not_modified(client, test_user_token, test_posts):
+    """Test conditional GET with If-None-Match."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    response = await client.get("/posts/", headers=headers)
+    etag = response.headers["ETag"]
+
+    with patch.object(RedisCache, "get_or_set") as mock_get:
+        response = await client.get(
+            "/posts/", headers={**headers, "If-None-Match": etag}
+        )
+        mock_get.assert_not_called()
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_etag_changes_after_create(client, test_user_token):
+    """Test that creating a post invalidates the listing's ETag."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    response = await client.get("/posts/", headers=headers)
+    etag = response.headers["ETag"]
+
+    await client.post("/posts/", json={"text": "ETag test post"},
+                      headers=headers)
+    response = await client.get(
+        "/posts/", headers={**headers, "If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["excerpt"] == "ETag test post"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_invalid_cursor(client, test_user_token):
+    """Test that a malformed cursor is rejected."""
+    response = await client.get(
+        "/posts/",
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("before_id", [99999999999, -2 ** 31 - 1, True])
+async def test_get_posts_cursor_out_of_range(client, test_user_token,
+                                             before_id):
+    """Test that a cursor ID that is not an int4 is rejected."""
+    response = await client.get(
+        "/posts/",
+        params={"cursor": encode_cursor({"id": before_id})},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("params, headers", [
+    ({"stream": 1}, {}),
+    ({}, {"Accept": "application/x-ndjson"}),
+])
+async def test_stream_posts(client, test_user_token, test_posts,
+                            params, headers):
+    """Test streaming the full post history as NDJSON."""
+    headers = {**headers, "Authorization": f"Bearer {test_user_token}"}
+    response = await client.get("/posts/", params=params, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    posts = [json.loads(line) for line in response.text.splitlines()]
+    assert {post.id for post in test_posts} <= {post["id"] for post in posts}
+    for post in posts:
+        assert set(post) == {"id", "text", "user_id"}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_post_preview_and_full_text(client, test_user_token):
+    """Test that listings carry an excerpt and the post its full text."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    text = "é" * (EXCERPT_LENGTH + 50)
+    response = await client.post("/posts/", json={"text": text},
+                                 headers=headers)
+    post_id = response.json()["id"]
+
+    response = await client.get("/posts/", headers=headers)
+    preview = next(post for post in response.json() if post["id"] == post_id)
+    assert preview["excerpt"] == text[:EXCERPT_LENGTH]
+    assert preview["byte_size"] == len(text.encode("utf-8"))
+
+    response = await client.get(f"/posts/{post_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["text"] == text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_by_ids(client, test_user_token, test_posts):
+    """Test fetching several posts with their full text."""
+    post_ids = [post.id for post in test_posts][::-1]
+    response = await client.get(
+        "/posts/batch",
+        params={"ids": ",".join(str(post_id) for post_id in post_ids)},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [post["id"] for post in data] == post_ids
+    assert [post["text"] for post in data] == [
+        post.text for post in test_posts
+    ][::-1]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_by_invalid_ids(client, test_user_token):
+    """Test that malformed, out of range or too many ids are rejected."""
+    too_many = settings.POSTS_MULTI_GET_MAX_IDS + 1
+    for ids in ("1,two", "1,2147483648", ",".join(["1"] * too_many)):
+        response = await client.get(
+            "/posts/batch",
+            params={"ids": ids},
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+
+        assert response.status_code == 400, ids
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_nonexistent_post(client, test_user_token):
+    """Test getting a post that doesn't exist."""
+    response = await client.get(
+        "/posts/99999",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 404
+    assert "not found" in response.json()["detail"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_post_id_out_of_range(client, test_user_token):
+    """Test that a post ID that is not an int4 is rejected."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    for method in (client.get, client.delete):
+        response = await method("/posts/2147483648", headers=headers)
+
+        assert response.status_code == 422
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -50,6 +290,74 @@ async def test_delete_nonexistent_post(client, test_user_token):
     assert "not found" in response.json()["detail"]
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_delete_posts(client, test_user_token):
+    """Test deleting several posts in one request."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    response = await client.post(
+        "/posts/batch",
+        json=[{"text": "Bulk delete 1"}, {"text": "Bulk delete 2"}],
+        headers=headers
+    )
+    post_ids = [post["id"] for post in response.json()]
+
+    response = await client.request(
+        "DELETE", "/posts/",
+        json={"post_ids": post_ids + [99999]},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted_ids"]) == sorted(post_ids)
+    response = await client.get("/posts/", headers=headers)
+    assert not any(post["id"] in post_ids for post in response.json())
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_posts(client, test_user_token):
+    """Test searching posts page by page."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    await client.post(
+        "/posts/batch",
+        json=[{"text": "Penguins swim"}, {"text": "Penguins waddle"},
+              {"text": "Owls hoot"}],
+        headers=headers
+    )
+
+    response = await client.get("/posts/search",
+                                params={"q": "penguins", "limit": 1},
+                                headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page) == 1
+    assert "rank" in first_page[0]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await client.get(
+        "/posts/search",
+        params={"q": "penguins", "limit": 1, "cursor": cursor},
+        headers=headers
+    )
+    second_page = response.json()
+    assert len(second_page) == 1
+    assert {first_page[0]["excerpt"], second_page[0]["excerpt"]} == {
+        "Penguins swim", "Penguins waddle"
+    }
+
+    response = await client.get(
+        "/posts/search", params={"q": "penguins", "cursor": "bogus"},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+    cursor = encode_cursor({"rank": 0.1, "id": 99999999999})
+    response = await client.get(
+        "/posts/search", params={"q": "penguins", "cursor": cursor},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_unauthorized_access(client):
     """Test accessing endpoints without authentication."""
@@ -83,3 +391,31 @@ async def test_large_post_creation(client, test_user_token):
 
     assert response.status_code == 413  # Request Entity Too Large
     assert "exceeds" in response.json()["detail"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_oversized_body_rejected_before_parsing(client,
+                                                      test_user_token):
+    """Test that a body over the route limit is rejected unread."""
+    response = await client.post(
+        "/posts/",
+        content=b"x" * (3 * 1024 * 1024),
+        headers={"Authorization": f"Bearer {test_user_token}",
+                 "Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 413
+    assert "Request body exceeds" in response.json()["detail"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_openapi_schemas_of_post_listings(client):
+    """Test that previews and full posts are documented separately."""
+    paths = (await client.get("/openapi.json")).json()["paths"]
+
+    def item_schema(path):
+        content = paths[path]["get"]["responses"]["200"]["content"]
+        return content["application/json"]["schema"]["items"]["$ref"]
+
+    assert item_schema("/posts/").endswith("/PostPreview")
+    assert item_schema("/posts/batch").endswith("/PostRead")
@@ -1,7 +1,12 @@
 import pytest
-from app.posts.repository import PostRepository
+from sqlalchemy import event
+
+from app.posts.models import EXCERPT_LENGTH
+from app.posts.repository import FastPostRepository, PostRepository
 from app.posts.schemas import PostCreate
 
+REPOSITORIES = [PostRepository, FastPostRepository]
+
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_post(db_session, test_user):
@@ -17,9 +22,57 @@ async def test_create_post(db_session, test_user):
 
 
 @pytest.mark.asyncio(loop_scope="session")
-async def test_get_posts_by_user_id(db_session, test_user, test_posts):
-    """Test getting posts by user ID."""
+async def test_create_post_leaves_commit_to_caller(db_session, test_user):
+    """Test that creating a post is a single INSERT and no COMMIT."""
+    repo = PostRepository(db_session)
+    sync_engine = db_session.bind.sync_engine
+    statements, commits = [], []
+
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(sync_engine, "before_cursor_execute", on_execute)
+    event.listen(sync_engine, "commit", on_commit)
+    try:
+        created_post = await repo.create(PostCreate(text="Unit of work"),
+                                         test_user.id)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", on_execute)
+        event.remove(sync_engine, "commit", on_commit)
+    await db_session.commit()
+
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT INTO posts")
+    assert commits == []
+    assert created_post.excerpt == "Unit of work"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_many_posts(db_session, test_user):
+    """Test creating several posts with one statement."""
     repo = PostRepository(db_session)
+    posts_data = [PostCreate(text=f"Bulk post {i}") for i in range(3)]
+
+    created_posts = await repo.create_many(posts_data, test_user.id)
+
+    assert [post.text for post in created_posts] == [
+        "Bulk post 0", "Bulk post 1", "Bulk post 2"
+    ]
+    for post in created_posts:
+        stored = await repo.get_by_id(post.id)
+        assert stored.text == post.text
+        assert stored.user_id == test_user.id
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("repository", REPOSITORIES)
+async def test_get_posts_by_user_id(db_session, test_user, test_posts,
+                                    repository):
+    """Test getting posts by user ID."""
+    repo = repository(db_session)
 
     posts = await repo.get_by_user_id(test_user.id)
 
@@ -28,6 +81,45 @@ async def test_get_posts_by_user_id(db_session, test_user, test_posts):
         assert post.user_id == test_user.id
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_post_sets_excerpt_and_byte_size(db_session, test_user):
+    """Test that the excerpt and size are stored with a new post."""
+    repo = PostRepository(db_session)
+    text = "ü" * (EXCERPT_LENGTH + 1)
+
+    created_post = await repo.create(PostCreate(text=text), test_user.id)
+
+    assert created_post.excerpt == text[:EXCERPT_LENGTH]
+    assert created_post.byte_size == len(text.encode("utf-8"))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("repository", REPOSITORIES)
+async def test_get_posts_by_user_id_keyset(db_session, test_user, test_posts,
+                                           repository):
+    """Test limiting and offsetting posts by ID."""
+    repo = repository(db_session)
+
+    first_page = await repo.get_by_user_id(test_user.id, limit=2)
+    assert len(first_page) == 2
+    assert first_page[0].id > first_page[1].id
+
+    next_page = await repo.get_by_user_id(test_user.id, limit=2,
+                                          before_id=first_page[-1].id)
+    assert all(post.id < first_page[-1].id for post in next_page)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_many_posts(db_session, test_user, test_posts):
+    """Test getting several posts by ID with one query."""
+    repo = PostRepository(db_session)
+    post_ids = [post.id for post in test_posts]
+
+    posts = await repo.get_many(post_ids + [99999])
+
+    assert sorted(post.id for post in posts) == sorted(post_ids)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_delete_post(db_session, test_user):
     """Test deleting a post."""
@@ -67,3 +159,46 @@ async def test_delete_post_wrong_user(db_session, test_user):
     # Post should still exist
     post = await repo.get_by_id(created_post.id)
     assert post is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_many_posts(db_session, test_user):
+    """Test deleting several posts with one statement."""
+    repo = PostRepository(db_session)
+    created_posts = await repo.create_many(
+        [PostCreate(text=f"Bulk delete {i}") for i in range(2)], test_user.id
+    )
+    post_ids = [post.id for post in created_posts]
+
+    # Posts of another user are left alone
+    assert await repo.delete_many(post_ids, test_user.id + 999) == []
+
+    deleted_ids = await repo.delete_many(post_ids + [99999], test_user.id)
+
+    assert sorted(deleted_ids) == sorted(post_ids)
+    for post_id in post_ids:
+        assert await repo.get_by_id(post_id) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_posts(db_session, test_user):
+    """Test ranked full-text search with keyset pagination."""
+    repo = PostRepository(db_session)
+    await repo.create_many([
+        PostCreate(text="Zebras graze. Zebras run. Zebras sleep."),
+        PostCreate(text="A zebra crossed the road"),
+        PostCreate(text="Nothing to see here"),
+    ], test_user.id)
+
+    first_page = await repo.search(test_user.id, "zebras", limit=1)
+    assert len(first_page) == 1
+    best_post, best_rank = first_page[0]
+    assert best_post.excerpt.startswith("Zebras graze")
+
+    second_page = await repo.search(test_user.id, "zebras", limit=10,
+                                    after=(best_rank, best_post.id))
+    assert [post.excerpt for post, _ in second_page] == [
+        "A zebra crossed the road"
+    ]
+    assert second_page[0][1] <= best_rank
+    assert await repo.search(test_user.id + 999, "zebras", limit=10) == []
@@ -1,7 +1,10 @@
+import json
 import pytest
 from fastapi import HTTPException
 from unittest.mock import patch
+from sqlalchemy import event
 
+from app.posts.repository import PostRepository
 from app.posts.service import PostService
 from app.posts.schemas import PostCreate
 from app.core.cache import RedisCache
@@ -20,6 +23,30 @@ async def test_create_post_service(db_session, test_user):
     assert created_post.user_id == test_user.id
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_post_commits_once(db_session, test_user):
+    """Test that creating a post commits once, before clearing the cache."""
+    service = PostService(db_session)
+    sync_engine = db_session.bind.sync_engine
+    calls = []
+
+    def on_commit(conn):
+        calls.append("commit")
+
+    async def clear_user_cache(self, user_id):
+        calls.append("clear_user_cache")
+
+    event.listen(sync_engine, "commit", on_commit)
+    try:
+        with patch.object(RedisCache, "clear_user_cache", clear_user_cache):
+            await service.create_post(PostCreate(text="Committed once"),
+                                      test_user.id)
+    finally:
+        event.remove(sync_engine, "commit", on_commit)
+
+    assert calls == ["commit", "clear_user_cache"]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_post_too_large(db_session, test_user):
     """Test that creating a post with too much content fails."""
@@ -42,13 +69,14 @@ async def test_get_user_posts_service(db_session, test_user, test_posts):
 
     # Clear cache first to ensure we're testing the database fetch
     cache = RedisCache()
-    cache.clear_user_cache(test_user.id)
+    await cache.clear_user_cache(test_user.id)
 
-    posts = await service.get_user_posts(test_user.id)
+    page = await service.get_user_posts_page(test_user.id)
+    posts = json.loads(page.body)
 
     assert len(posts) >= 3  # At least 3 from the fixture
     for post in posts:
-        assert post.user_id == test_user.id
+        assert post["user_id"] == test_user.id
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -58,20 +86,61 @@ async def test_get_user_posts_cached(db_session, test_user):
 
     # Clear cache first
     cache = RedisCache()
-    cache.clear_user_cache(test_user.id)
+    await cache.clear_user_cache(test_user.id)
 
-    # Mock the cache.get and cache.set methods
-    with patch.object(RedisCache, 'get', return_value=None) as mock_get, \
-         patch.object(RedisCache, 'set') as mock_set:
+    # Mock the cache.get_raw and cache.set_raw methods
+    with patch.object(RedisCache, 'get_raw', return_value=None) as mock_get, \
+         patch.object(RedisCache, 'set_raw') as mock_set:
 
         # First call should miss cache and set it
-        await service.get_user_posts(test_user.id)
+        await service.get_user_posts_page(test_user.id)
 
         # Verify cache interactions
         mock_get.assert_called_once()
         mock_set.assert_called_once()
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_posts_page_reads_generation_once(db_session,
+                                                         test_user,
+                                                         test_posts):
+    """Test that a page miss reads the generation once and returns JSON."""
+    service = PostService(db_session)
+    await RedisCache().clear_user_cache(test_user.id)
+
+    with patch.object(RedisCache, "user_generation", autospec=True,
+                      side_effect=RedisCache.user_generation) as mock_gen:
+        page = await service.get_user_posts_page(test_user.id, limit=1)
+        mock_gen.assert_called_once()
+
+    assert page.etag.startswith('"')
+    assert [post["user_id"] for post in json.loads(page.body)] == [
+        test_user.id
+    ]
+    assert page.next_cursor is not None
+
+    not_modified = await service.get_user_posts_page(
+        test_user.id, limit=1, if_none_match=page.etag
+    )
+    assert not_modified.body is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_posts_caches_empty_result(db_session):
+    """Test that a user without posts is served from cache."""
+    service = PostService(db_session)
+    user_id = 987654  # A user without posts
+    await RedisCache().clear_user_cache(user_id)
+
+    with patch.object(service.repo, 'get_by_user_id',
+                      return_value=[]) as mock_get:
+        for _ in range(2):
+            page = await service.get_user_posts_page(user_id)
+            assert json.loads(page.body) == []
+
+        mock_get.assert_called_once()
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_delete_post_service(db_session, test_user):
     """Test deleting a post via service."""
@@ -85,8 +154,9 @@ async def test_delete_post_service(db_session, test_user):
     assert result is True
 
     # Try to get the posts - deleted post should not be included
-    posts = await service.get_user_posts(test_user.id)
-    assert not any(post.id == created_post.id for post in posts)
+    page = await service.get_user_posts_page(test_user.id)
+    assert not any(post["id"] == created_post.id
+                   for post in json.loads(page.body))
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -111,3 +181,101 @@ async def test_cache_cleared_on_post_creation(db_session, test_user):
 
         # Verify cache was cleared for the user
         mock_clear.assert_called_once_with(test_user.id)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cache_cleared_once_on_batch_creation(db_session, test_user):
+    """Test that cache is cleared once when posts are created in bulk."""
+    service = PostService(db_session)
+
+    with patch.object(RedisCache, 'clear_user_cache') as mock_clear:
+        posts_data = [PostCreate(text=f"Batch cache test {i}")
+                      for i in range(3)]
+        created_posts = await service.create_posts(posts_data, test_user.id)
+
+        assert len(created_posts) == 3
+        mock_clear.assert_called_once_with(test_user.id)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_uses_per_post_cache(db_session, test_user,
+                                             test_posts):
+    """Test that posts fetched once are then served from the cache."""
+    service = PostService(db_session)
+    post_ids = [post.id for post in test_posts]
+    await RedisCache().delete(f"post:{post_ids[0]}")
+
+    posts = await service.get_posts(post_ids, test_user.id)
+    assert [post.id for post in posts] == post_ids
+
+    with patch.object(PostRepository, 'get_many') as mock_get_many:
+        posts = await service.get_posts(post_ids, test_user.id)
+        mock_get_many.assert_not_called()
+    assert [post.text for post in posts] == [post.text for post in test_posts]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_posts_of_other_user(db_session, test_user, test_posts):
+    """Test that posts of another user are not returned."""
+    service = PostService(db_session)
+
+    posts = await service.get_posts([test_posts[0].id], test_user.id + 999)
+
+    assert posts == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_post_clears_post_cache(db_session, test_user):
+    """Test that a deleted post is not served from the cache."""
+    service = PostService(db_session)
+    created_post = await service.create_post(
+        PostCreate(text="Cached post to delete"), test_user.id
+    )
+    assert await service.get_post(created_post.id, test_user.id)
+
+    await service.delete_post(created_post.id, test_user.id)
+
+    assert await service.get_post(created_post.id, test_user.id) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cache_cleared_once_on_bulk_deletion(db_session, test_user):
+    """Test that cache is cleared once when posts are deleted in bulk."""
+    service = PostService(db_session)
+    created_posts = await service.create_posts(
+        [PostCreate(text=f"Bulk delete cache test {i}") for i in range(3)],
+        test_user.id
+    )
+    post_ids = [post.id for post in created_posts]
+    assert len(await service.get_posts(post_ids, test_user.id)) == 3
+
+    with patch.object(RedisCache, 'clear_user_cache') as mock_clear:
+        deleted_ids = await service.delete_posts(post_ids + [99999],
+                                                 test_user.id)
+        mock_clear.assert_called_once_with(test_user.id)
+
+    assert sorted(deleted_ids) == sorted(post_ids)
+    assert await service.get_posts(post_ids, test_user.id) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_results_cached_until_posts_change(db_session,
+                                                       test_user):
+    """Test that search results are cached and refreshed on new posts."""
+    service = PostService(db_session)
+    await service.create_post(PostCreate(text="Cached giraffe"),
+                              test_user.id)
+
+    posts, _ = await service.search_posts(test_user.id, "giraffe", 10)
+    assert len(posts) == 1
+
+    with patch.object(PostRepository, 'search') as mock_search:
+        cached_posts, _ = await service.search_posts(test_user.id,
+                                                     "giraffe", 10)
+        mock_search.assert_not_called()
+    assert cached_posts == posts
+
+    await service.create_post(PostCreate(text="Another giraffe"),
+                              test_user.id)
+    posts, _ = await service.search_posts(test_user.id, "giraffe", 10)
+    assert len(posts) == 2
@@ -57,6 +57,7 @@ async def test_login_user(client):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
+    assert "refresh_token" in data
     assert "token_type" in data
     assert data["token_type"] == "bearer"
 
@@ -71,6 +72,45 @@ async def test_login_user(client):
     assert "exp" in payload  # Expiration time
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_refresh_token_rotation(client):
+    """Test refreshing tokens and revoking them when one is reused."""
+    email = "refresh@example.com"
+    password = "testpass123"
+    await client.post(
+        "/auth/register",
+        json={"email": email, "password": password}
+    )
+    response = await client.post(
+        "/auth/login",
+        json={"email": email, "password": password}
+    )
+    first_refresh_token = response.json()["refresh_token"]
+
+    response = await client.post(
+        "/auth/refresh", json={"refresh_token": first_refresh_token}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    second_refresh_token = data["refresh_token"]
+    assert second_refresh_token != first_refresh_token
+    response = await client.get(
+        "/posts/",
+        headers={"Authorization": f"Bearer {data['access_token']}"}
+    )
+    assert response.status_code == 200
+
+    # Replaying a used token revokes its whole family
+    response = await client.post(
+        "/auth/refresh", json={"refresh_token": first_refresh_token}
+    )
+    assert response.status_code == 401
+    response = await client.post(
+        "/auth/refresh", json={"refresh_token": second_refresh_token}
+    )
+    assert response.status_code == 401
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_login_wrong_password(client):
     """Test login with wrong password."""
@@ -1,8 +1,14 @@
+from unittest.mock import patch
+
 import pytest
-from app.users.repository import UserRepository
+from app.core.config import settings
+from app.users.repository import (FastUserRepository, UserRepository,
+                                  get_user_repository)
 from app.users.schemas import UserCreate
 from app.core.security import verify_password
 
+REPOSITORIES = [UserRepository, FastUserRepository]
+
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_user(db_session):
@@ -18,9 +24,40 @@ async def test_create_user(db_session):
 
 
 @pytest.mark.asyncio(loop_scope="session")
-async def test_get_nonexistent_user_by_email(db_session):
-    """Test getting a nonexistent user by email."""
+async def test_create_user_with_taken_email(db_session):
+    """Test that creating a user with a taken email returns None."""
     repo = UserRepository(db_session)
+    user_data = UserCreate(email="taken@example.com", password="password123")
+    await repo.create(user_data)
+
+    assert await repo.create(user_data) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("repository", REPOSITORIES)
+async def test_get_user_by_id_and_email(db_session, repository):
+    """Test getting a user by ID and by email."""
+    email = f"lookup-{repository.__name__.lower()}@example.com"
+    created_user = await UserRepository(db_session).create(
+        UserCreate(email=email, password="password123")
+    )
+    await db_session.commit()
+    repo = repository(db_session)
+
+    by_id = await repo.get_by_id(created_user.id)
+    by_email = await repo.get_by_email(email)
+
+    for user in (by_id, by_email):
+        assert user.id == created_user.id
+        assert user.email == email
+        assert user.hashed_password == created_user.hashed_password
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("repository", REPOSITORIES)
+async def test_get_nonexistent_user_by_email(db_session, repository):
+    """Test getting a nonexistent user by email."""
+    repo = repository(db_session)
 
     user = await repo.get_by_email("nonexistent@example.com")
 
@@ -28,10 +65,21 @@ async def test_get_nonexistent_user_by_email(db_session):
 
 
 @pytest.mark.asyncio(loop_scope="session")
-async def test_get_nonexistent_user_by_id(db_session):
+@pytest.mark.parametrize("repository", REPOSITORIES)
+async def test_get_nonexistent_user_by_id(db_session, repository):
     """Test getting a nonexistent user by ID."""
-    repo = UserRepository(db_session)
+    repo = repository(db_session)
 
     user = await repo.get_by_id(999999)  # A user ID that doesn't exist
 
     assert user is None
+
+
+def test_fast_path_is_opt_in(db_session):
+    """Test that the fast path is used only when enabled without PgBouncer."""
+    with patch.object(settings, "DB_FAST_PATH", False):
+        assert type(get_user_repository(db_session)) is UserRepository
+    with patch.object(settings, "DB_FAST_PATH", True):
+        assert type(get_user_repository(db_session)) is FastUserRepository
+        with patch.object(settings, "DB_PGBOUNCER", True):
+            assert type(get_user_repository(db_session)) is UserRepository
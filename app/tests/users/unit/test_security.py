@@ -1,16 +1,32 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
 import pytest
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 
 from app.core.security import (
     get_password_hash,
+    get_password_hash_async,
     verify_password,
+    verify_password_async,
+    PasswordHasher,
     create_token,
     create_access_token,
     get_current_user,
+    principal_cache,
 )
+from app.core.cache import LocalCache, RedisCache
+from app.core.principals import PrincipalCache
+from app.db.session import get_db, get_read_db
+from app.main import app
 from app.core.config import settings
+from app.users.repository import UserRepository, get_user_repository
+from app.users.schemas import UserCreate, UserRead
 from fastapi import HTTPException
+from fastapi.security.http import HTTPAuthorizationCredentials
 
 
 def test_password_hashing():
@@ -28,6 +44,32 @@ def test_password_hashing():
     assert not verify_password("wrongpassword", hashed)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_password_hashing_async():
+    """Test hashing and verification in the hashing pool."""
+    hashed = await get_password_hash_async("testpassword123")
+
+    assert await verify_password_async("testpassword123", hashed)
+    assert not await verify_password_async("wrongpassword", hashed)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_password_hasher_rejects_when_saturated():
+    """Test that calls beyond the pending limit get 503."""
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    release = threading.Event()
+    running = asyncio.create_task(hasher.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await hasher.run(release.wait)
+
+    assert excinfo.value.status_code == 503
+    release.set()
+    assert await running is True
+    hasher.shutdown()
+
+
 def test_create_token():
     """Test token creation with custom claims."""
     data = {"sub": "user123", "role": "admin"}
@@ -86,3 +128,84 @@ async def test_get_current_user_invalid_token(db_session):
 
     assert excinfo.value.status_code == 401
     assert "Could not validate credentials" in excinfo.value.detail
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_current_user_cached(db_session):
+    """Test that the user of a token is only loaded from the database once."""
+    test_user = await UserRepository(db_session).create(
+        UserCreate(email="principal@example.com", password="password123")
+    )
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=create_access_token(str(test_user.id))
+    )
+    user = await get_current_user(credentials, db_session)
+    # The ORM or the fast path repository, depending on DB_FAST_PATH
+    repository = type(get_user_repository(db_session))
+
+    with patch.object(repository, "get_by_id") as mock_get:
+        cached_user = await get_current_user(credentials, db_session)
+        mock_get.assert_not_called()
+    assert cached_user == user
+
+    # Dropping the user's cached tokens forces a database lookup
+    await principal_cache.invalidate_user(test_user.id)
+    with patch.object(repository, "get_by_id",
+                      return_value=None) as mock_get:
+        with pytest.raises(HTTPException):
+            await get_current_user(credentials, db_session)
+        mock_get.assert_called_once()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_principals_kept_out_of_shared_local_tier():
+    """Test that cached principals do not use the page cache's LRU."""
+    shared = LocalCache(max_entries=10, max_bytes=4096)
+    with patch.object(settings, "CACHE_LOCAL_ENABLED", True), \
+            patch.object(RedisCache, "_local", shared):
+        principals = PrincipalCache()
+        try:
+            user = UserRead(id=525252, email="tier@example.com")
+            token = create_access_token(str(user.id))
+            await principals.set(token, user, expires_at=time.time() + 60)
+            principals._local.clear()
+
+            assert await principals.get(user.id, token) == user
+            assert not any(key.startswith("principal:")
+                           for key in shared._entries)
+        finally:
+            RedisCache._extra_local.remove(("principal:", principals._local))
+            await principals.invalidate_user(525252)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_current_user_stateless(db_session):
+    """Test that stateless mode trusts the token claims."""
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer",
+        credentials=create_access_token("424242", email="ghost@example.com")
+    )
+
+    with patch.object(settings, "AUTH_STATELESS", True):
+        user = await get_current_user(credentials, db_session)
+
+    assert user.id == 424242
+    assert user.email == "ghost@example.com"
+
+
+def _dependencies(dependant) -> set:
+    calls = set()
+    for dependency in dependant.dependencies:
+        calls.add(dependency.call)
+        calls |= _dependencies(dependency)
+    return calls
+
+
+def test_routes_use_a_single_session():
+    """Test that no route checks out both a read and a write session."""
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None:
+            continue
+        calls = _dependencies(dependant)
+        assert not {get_db, get_read_db} <= calls, route.path
@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 import pytest
 from fastapi import HTTPException
 
+from app.core.config import settings
 from app.users.service import UserService
 from app.users.schemas import UserCreate
 
@@ -62,3 +65,20 @@ async def test_authenticate_wrong_password(db_session):
     authenticated_user = await service.authenticate(email, "wrongpass123")
 
     assert authenticated_user is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_authenticate_rehashes_outdated_cost(db_session):
+    """Test that a password hashed with an old cost is rehashed on login."""
+    service = UserService(db_session)
+    email = "rehash@example.com"
+    password = "rehashpass123"
+    with patch.object(settings, "PASSWORD_HASH_ROUNDS", 4):
+        await service.register(UserCreate(email=email, password=password))
+
+    with patch.object(settings, "PASSWORD_HASH_ROUNDS", 5):
+        assert await service.authenticate(email, password) is not None
+
+    user = await service.repo.get_by_email(email)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert await service.authenticate(email, password) is not None
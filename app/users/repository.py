@@ -1,13 +1,25 @@
+from typing import NamedTuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from app.users.models import User
 from app.users.schemas import UserCreate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.db.session import driver_connection, fast_path_enabled
+
+USER_BY_ID_SQL = "SELECT id, email, hashed_password FROM users WHERE id = $1"
+USER_BY_EMAIL_SQL = (
+    "SELECT id, email, hashed_password FROM users WHERE email = $1"
+)
 
 
 class UserRepository:
     """
     Repository class for handling database operations related to users
+
+    Writes are only executed: committing them is left to the caller, so
+    that a request commits its unit of work once.
     """
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -40,21 +52,127 @@ class UserRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
-    async def create(self, user: UserCreate) -> User:
+    async def create(self, user: UserCreate) -> User | None:
         """
-        Create a new user
+        Create a new user with a single INSERT ... ON CONFLICT statement
 
         Args:
             user: User data to create
 
         Returns:
-            User: Created user object
+            User | None: Created user object, None if the email is taken
+        """
+        hashed_password = await get_password_hash_async(user.password)
+        query = (
+            insert(User)
+            .values(email=user.email, hashed_password=hashed_password)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+        )
+        result = await self.db.execute(query)
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            return None
+        return User(id=user_id, email=user.email,
+                    hashed_password=hashed_password)
+
+    async def create_many(self, users: list[tuple[str, str]]) -> list[str]:
+        """
+        Create several users at once, skipping emails that are taken
+
+        Args:
+            users: Email and password hash of each user
+
+        Returns:
+            list[str]: Emails of the users that were created
+        """
+        if not users:
+            return []
+        query = (
+            insert(User)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        result = await self.db.execute(
+            query,
+            [{"email": email, "hashed_password": hashed_password}
+             for email, hashed_password in users]
+        )
+        return result.scalars().all()
+
+    async def update_password_hash(self, user_id: int,
+                                   hashed_password: str) -> None:
+        """
+        Replace the stored password hash of a user
+
+        Args:
+            user_id: User's ID
+            hashed_password: New password hash
         """
-        db_user = User(
-            email=user.email,
-            hashed_password=get_password_hash(user.password)
+        query = (
+            update(User)
+            .filter(User.id == user_id)
+            .values(hashed_password=hashed_password)
         )
-        self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
-        return db_user
+        await self.db.execute(query)
+
+
+class UserRow(NamedTuple):
+    """
+    User as returned by the fast path, without ORM state
+    """
+    id: int
+    email: str
+    hashed_password: str
+
+
+class FastUserRepository(UserRepository):
+    """
+    User repository whose lookups by ID and email skip the ORM
+
+    They run fixed SQL on the asyncpg connection, which prepares each
+    statement once per connection, and return UserRow tuples instead of
+    User objects. Writes are inherited unchanged.
+    """
+    async def get_by_email(self, email: str) -> UserRow | None:
+        """
+        Get a user by email
+
+        Args:
+            email: User's email address
+
+        Returns:
+            UserRow | None: User if found, None otherwise
+        """
+        connection = await driver_connection(self.db)
+        record = await connection.fetchrow(USER_BY_EMAIL_SQL, email)
+        return UserRow(*record) if record else None
+
+    async def get_by_id(self, user_id: int) -> UserRow | None:
+        """
+        Get a user by ID
+
+        Args:
+            user_id: User's ID
+
+        Returns:
+            UserRow | None: User if found, None otherwise
+        """
+        connection = await driver_connection(self.db)
+        record = await connection.fetchrow(USER_BY_ID_SQL, user_id)
+        return UserRow(*record) if record else None
+
+
+def get_user_repository(db: AsyncSession) -> UserRepository:
+    """
+    Get the user repository selected by DB_FAST_PATH
+
+    Args:
+        db: Database session
+
+    Returns:
+        UserRepository: Fast path repository if enabled, ORM one otherwise
+    """
+    if fast_path_enabled():
+        return FastUserRepository(db)
+    return UserRepository(db)
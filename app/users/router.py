@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.users.schemas import UserCreate, UserLogin, UserRead, Token
+from app.users.schemas import (UserCreate, UserLogin, UserRead, Token,
+                               TokenRefresh)
 from app.users.service import UserService
+from app.users.tokens import RefreshTokenStore
 from app.core.security import create_access_token
 from app.db.session import get_db
 
@@ -41,7 +43,7 @@ async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
         db: Database session
 
     Returns:
-        Token: JWT access token
+        Token: JWT access token and refresh token
     """
     service = UserService(db)
     user = await service.authenticate(data.email, data.password)
@@ -50,5 +52,33 @@ async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
-    access_token = create_access_token(sub=str(user.id))
-    return {"access_token": access_token, "token_type": "bearer"}
+    access_token = create_access_token(sub=str(user.id), email=user.email)
+    refresh_token = await RefreshTokenStore().issue(user)
+    return {"access_token": access_token, "refresh_token": refresh_token,
+            "token_type": "bearer"}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(data: TokenRefresh):
+    """
+    Exchange a refresh token for a new access token and refresh token
+
+    Each refresh token can be used once. Reusing one revokes every token
+    descending from the same login.
+
+    Args:
+        data: Refresh token from the previous login or refresh
+
+    Returns:
+        Token: JWT access token and refresh token
+    """
+    rotated = await RefreshTokenStore().rotate(data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    user, refresh_token = rotated
+    access_token = create_access_token(sub=str(user.id), email=user.email)
+    return {"access_token": access_token, "refresh_token": refresh_token,
+            "token_type": "bearer"}
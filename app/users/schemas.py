@@ -38,4 +38,12 @@ class Token(BaseModel):
     Schema for authentication token
     """
     access_token: str = Field(..., description="JWT access token")
+    refresh_token: str = Field(..., description="Single-use refresh token")
     token_type: str = Field("bearer", description="Token type")
+
+
+class TokenRefresh(BaseModel):
+    """
+    Schema for exchanging a refresh token for new tokens
+    """
+    refresh_token: str = Field(..., description="Refresh token to exchange")
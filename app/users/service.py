@@ -2,8 +2,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from app.users.schemas import UserCreate, UserRead
-from app.users.repository import UserRepository
-from app.core.security import verify_password
+from app.users.repository import get_user_repository
+from app.core.security import (get_password_hash_async,
+                               password_needs_rehash, verify_password_async)
 
 
 class UserService:
@@ -11,7 +12,8 @@ class UserService:
     Service class for handling user-related business logic
     """
     def __init__(self, db: AsyncSession):
-        self.repo = UserRepository(db)
+        self.db = db
+        self.repo = get_user_repository(db)
 
     async def register(self, user: UserCreate) -> UserRead:
         """
@@ -26,19 +28,22 @@ class UserService:
         Raises:
             HTTPException: If email is already registered
         """
-        existing_user = await self.repo.get_by_email(user.email)
-        if existing_user:
+        db_user = await self.repo.create(user)
+        await self.db.commit()
+        if db_user is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        db_user = await self.repo.create(user)
         return UserRead.model_validate(db_user)
 
     async def authenticate(self, email: str, password: str) -> UserRead | None:
         """
         Authenticate a user with email and password
 
+        A password hashed with an outdated cost is hashed again with the
+        configured one and stored.
+
         Args:
             email: User's email address
             password: User's password
@@ -47,6 +52,12 @@ class UserService:
             UserRead | None: User data if auth succeeds, None otherwise
         """
         user = await self.repo.get_by_email(email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(
+                password, user.hashed_password):
             return None
+        if password_needs_rehash(user.hashed_password):
+            await self.repo.update_password_hash(
+                user.id, await get_password_hash_async(password)
+            )
+            await self.db.commit()
         return UserRead.model_validate(user)
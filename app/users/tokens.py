@@ -0,0 +1,89 @@
+import hashlib
+import logging
+import secrets
+
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.users.schemas import UserRead
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenStore:
+    """
+    Store of rotating refresh tokens, kept hashed in Redis
+
+    Every login starts a token family. Refreshing replaces the family's
+    current token with a new one; presenting a token that was already
+    replaced means it leaked, so the whole family is revoked.
+    """
+    def __init__(self):
+        self.cache = RedisCache()
+        self.expire_time = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+    async def issue(self, user: UserRead) -> str:
+        """
+        Start a new token family for a user
+
+        Args:
+            user: User the token is issued for
+
+        Returns:
+            str: Refresh token
+        """
+        family = secrets.token_urlsafe(16)
+        token = secrets.token_urlsafe(32)
+        token_hash = self._hash(token)
+        await self.cache.set(
+            self._token_key(token_hash),
+            {"user_id": user.id, "email": user.email, "family": family},
+            self.expire_time
+        )
+        await self.cache.set_raw(self._family_key(family),
+                                 token_hash.encode("ascii"),
+                                 self.expire_time)
+        return token
+
+    async def rotate(self, token: str) -> tuple[UserRead, str] | None:
+        """
+        Exchange a refresh token for a new one of the same family
+
+        Args:
+            token: Refresh token presented by the client
+
+        Returns:
+            tuple[UserRead, str] | None: User the token was issued for and
+                the new refresh token, None if the token is invalid,
+                expired or was already used
+        """
+        token_hash = self._hash(token)
+        record = await self.cache.get(self._token_key(token_hash))
+        if record is None:
+            return None
+        user = UserRead(id=record["user_id"], email=record["email"])
+
+        new_token = secrets.token_urlsafe(32)
+        new_hash = self._hash(new_token)
+        await self.cache.set(self._token_key(new_hash), record,
+                             self.expire_time)
+        family_key = self._family_key(record["family"])
+        if not await self.cache.compare_and_set(
+                family_key, token_hash.encode("ascii"),
+                new_hash.encode("ascii"), self.expire_time):
+            logger.warning("Refresh token reused, revoking its family "
+                           "for user %s", user.id)
+            await self.cache.delete(family_key, self._token_key(new_hash))
+            return None
+        return user, new_token
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _token_key(token_hash: str) -> str:
+        return f"refresh:{token_hash}"
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"refresh:family:{family}"